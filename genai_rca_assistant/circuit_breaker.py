@@ -0,0 +1,129 @@
+"""
+Circuit Breaker Utilities
+Per-host circuit breaker + bulkhead for outbound HTTP calls (Slack, Jira)
+"""
+import time
+import logging
+import threading
+from typing import Callable, Dict, Optional
+
+logger = logging.getLogger("circuit_breaker")
+
+STATE_CLOSED = "CLOSED"
+STATE_OPEN = "OPEN"
+STATE_HALF_OPEN = "HALF_OPEN"
+
+
+class CircuitBreakerError(Exception):
+    """Raised when a call is short-circuited because the breaker is open or the bulkhead is full"""
+
+
+class BulkheadFullError(CircuitBreakerError):
+    """Raised when no bulkhead slot frees up within the wait timeout (host busy, not failing)"""
+
+
+def _default_is_failure(result) -> bool:
+    """Treat HTTP 5xx responses as upstream failures"""
+    status_code = getattr(result, "status_code", None)
+    return status_code is not None and status_code >= 500
+
+
+class CircuitBreaker:
+    """
+    Thread-safe CLOSED -> OPEN -> HALF_OPEN circuit breaker with a bounded-semaphore bulkhead.
+
+    - CLOSED: calls pass through; consecutive failures are counted.
+    - OPEN: after `fail_max` consecutive failures, calls fail fast for `reset_timeout` seconds.
+    - HALF_OPEN: one trial call is allowed; success closes the breaker, failure re-opens it.
+
+    The bulkhead caps concurrent in-flight calls to the host at `max_concurrency`; a call that
+    finds it full waits up to `bulkhead_wait` seconds for a slot before raising BulkheadFullError.
+    """
+
+    def __init__(self, name: str, fail_max: int = 5, reset_timeout: float = 30,
+                 max_concurrency: int = 10, bulkhead_wait: float = 5, is_failure: Optional[Callable] = None):
+        self.name = name
+        self.fail_max = fail_max
+        self.reset_timeout = reset_timeout
+        self.bulkhead_wait = bulkhead_wait
+        self.is_failure = is_failure or _default_is_failure
+        self._bulkhead = threading.BoundedSemaphore(max_concurrency)
+        self._lock = threading.Lock()
+        self._state = STATE_CLOSED
+        self._fail_count = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == STATE_OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                return STATE_HALF_OPEN
+            return self._state
+
+    def _before_call(self):
+        with self._lock:
+            if self._state == STATE_OPEN:
+                if time.monotonic() - self._opened_at < self.reset_timeout:
+                    raise CircuitBreakerError(f"Circuit breaker '{self.name}' is OPEN")
+                self._state = STATE_HALF_OPEN
+                self._trial_in_flight = False
+            if self._state == STATE_HALF_OPEN:
+                if self._trial_in_flight:
+                    raise CircuitBreakerError(f"Circuit breaker '{self.name}' is HALF_OPEN (trial in flight)")
+                self._trial_in_flight = True
+
+    def _on_success(self):
+        with self._lock:
+            if self._state != STATE_CLOSED:
+                logger.info("Circuit breaker '%s' CLOSED after successful trial call", self.name)
+            self._state = STATE_CLOSED
+            self._fail_count = 0
+            self._trial_in_flight = False
+
+    def _on_failure(self):
+        with self._lock:
+            self._fail_count += 1
+            self._trial_in_flight = False
+            if self._state == STATE_HALF_OPEN or self._fail_count >= self.fail_max:
+                if self._state != STATE_OPEN:
+                    logger.warning("Circuit breaker '%s' OPEN after %d failure(s); short-circuiting for %ss",
+                                   self.name, self._fail_count, self.reset_timeout)
+                self._state = STATE_OPEN
+                self._opened_at = time.monotonic()
+
+    def call(self, func: Callable, *args, **kwargs):
+        """Invoke `func` through the breaker. Raises CircuitBreakerError when short-circuited
+        and BulkheadFullError when no slot frees up within `bulkhead_wait`."""
+        self._before_call()
+        if not self._bulkhead.acquire(timeout=self.bulkhead_wait):
+            with self._lock:
+                self._trial_in_flight = False
+            raise BulkheadFullError(f"Bulkhead for '{self.name}' is full after waiting {self.bulkhead_wait}s")
+        try:
+            result = func(*args, **kwargs)
+        except Exception:
+            self._on_failure()
+            raise
+        finally:
+            self._bulkhead.release()
+        if self.is_failure(result):
+            self._on_failure()
+        else:
+            self._on_success()
+        return result
+
+
+# One breaker per upstream host
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(name: str, **kwargs) -> CircuitBreaker:
+    """Return the shared breaker for `name`, creating it on first use"""
+    with _breakers_lock:
+        breaker = _breakers.get(name)
+        if breaker is None:
+            breaker = CircuitBreaker(name, **kwargs)
+            _breakers[name] = breaker
+        return breaker
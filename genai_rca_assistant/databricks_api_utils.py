@@ -3,8 +3,14 @@ Databricks API Utilities
 Fetch detailed job run information from Databricks REST API
 """
 import os
+import time
+import random
 import logging
+import threading
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional, Dict
 
 logger = logging.getLogger("databricks_api_utils")
@@ -13,7 +19,166 @@ logger = logging.getLogger("databricks_api_utils")
 DATABRICKS_HOST = os.getenv("DATABRICKS_HOST", "")
 DATABRICKS_TOKEN = os.getenv("DATABRICKS_TOKEN", "")
 
+# Normalized once: workspace base URL and the Jobs API endpoints used below
+_HOST = DATABRICKS_HOST.rstrip('/')
+_RUNS_GET_URL = f"{_HOST}/api/2.1/jobs/runs/get"
+_RUNS_GET_OUTPUT_URL = f"{_HOST}/api/2.1/jobs/runs/get-output"
+
+# Shared keep-alive session: the run lookup and its task-output lookups all go to the same
+# workspace host, so they reuse one pooled TLS connection instead of handshaking per call
+_session = requests.Session()
+# Credentials are fixed for the process, so the auth headers are set once on the session
+_session.headers.update({
+    "Authorization": f"Bearer {DATABRICKS_TOKEN}",
+    "Content-Type": "application/json"
+})
+# Everything goes to one host, so one pool sized for the peak of concurrent callers (webhook
+# lookups running in worker threads plus task-output fan-out). Connections beyond pool_maxsize
+# are discarded after use, so an undersized pool falls back to a fresh TLS handshake per burst.
+DATABRICKS_HTTP_POOL_MAXSIZE = int(os.getenv("DATABRICKS_HTTP_POOL_MAXSIZE", "20"))
+_session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=DATABRICKS_HTTP_POOL_MAXSIZE))
+
+# Bounded pool for fetching the outputs of several failed tasks of one run concurrently
+TASK_OUTPUT_FETCH_CONCURRENCY = 4
+_task_output_pool = ThreadPoolExecutor(max_workers=TASK_OUTPUT_FETCH_CONCURRENCY, thread_name_prefix="dbx-task-output")
+
+# Retry policy for transient API failures (5xx responses, connection resets, timeouts):
+# capped exponential backoff with +/-25% jitter. 429 throttling waits for the server's
+# Retry-After instead. Other 4xx responses and other errors fail fast.
+DATABRICKS_API_MAX_ATTEMPTS = int(os.getenv("DATABRICKS_API_MAX_ATTEMPTS", "3"))
+_BACKOFF_BASE_SECONDS = 1.0
+_BACKOFF_CAP_SECONDS = 8.0
+_RETRYABLE_ERRORS = (requests.ConnectionError, requests.Timeout)
+_RETRY_AFTER_CAP_SECONDS = 30.0
+# Wall-clock budget for one _api_get call, retries and waits included: no retry starts (and no
+# attempt's read timeout runs) past it, so a lookup cannot hold its worker thread much longer
+DATABRICKS_API_DEADLINE_SECONDS = float(os.getenv("DATABRICKS_API_DEADLINE_SECONDS", "30"))
+
+# (connect, read) timeouts: a short connect timeout so an unreachable workspace fails fast and
+# is retried, while the read budget still covers slow responses during control-plane incidents
+DATABRICKS_CONNECT_TIMEOUT = float(os.getenv("DATABRICKS_CONNECT_TIMEOUT", "3.05"))
+DATABRICKS_READ_TIMEOUT = float(os.getenv("DATABRICKS_READ_TIMEOUT", "10"))
+_API_TIMEOUT = (DATABRICKS_CONNECT_TIMEOUT, DATABRICKS_READ_TIMEOUT)
+
+
+def _retry_after_seconds(response: requests.Response) -> Optional[float]:
+    """Delay requested by a 429's Retry-After header (delta-seconds form), capped; None if absent/unparseable"""
+    try:
+        return min(max(float(response.headers["Retry-After"]), 0.0), _RETRY_AFTER_CAP_SECONDS)
+    except (KeyError, ValueError):
+        return None
+
+
+def _api_get(url: str, params: Dict, timeout: tuple = _API_TIMEOUT) -> requests.Response:
+    """GET against the Databricks API, retrying transient failures with backoff. Returns the last response."""
+    deadline = time.monotonic() + DATABRICKS_API_DEADLINE_SECONDS
+    delay = _BACKOFF_BASE_SECONDS
+    for attempt in range(1, DATABRICKS_API_MAX_ATTEMPTS + 1):
+        connect_timeout, read_timeout = timeout
+        read_timeout = max(min(read_timeout, deadline - time.monotonic()), 0.1)
+        response = error = None
+        try:
+            response = _session.get(url, params=params, timeout=(connect_timeout, read_timeout))
+        except _RETRYABLE_ERRORS as e:
+            if attempt == DATABRICKS_API_MAX_ATTEMPTS:
+                raise
+            error = e
+            reason = f"{type(e).__name__}: {e}"
+        else:
+            if (response.status_code < 500 and response.status_code != 429) or attempt == DATABRICKS_API_MAX_ATTEMPTS:
+                return response
+            reason = f"HTTP {response.status_code}"
+        wait = None
+        if error is None and response.status_code == 429:
+            wait = _retry_after_seconds(response)
+        if wait is None:
+            wait = delay * random.uniform(0.75, 1.25)
+        if time.monotonic() + wait >= deadline:
+            logger.warning(f"Databricks API call failed ({reason}); retry budget of "
+                           f"{DATABRICKS_API_DEADLINE_SECONDS}s exhausted after {attempt} attempt(s)")
+            if error is not None:
+                raise error
+            return response
+        logger.warning(f"Databricks API call failed ({reason}); retrying in {wait:.1f}s "
+                       f"(attempt {attempt}/{DATABRICKS_API_MAX_ATTEMPTS})")
+        time.sleep(wait)
+        delay = min(delay * 2, _BACKOFF_CAP_SECONDS)
+
+
+def warm_databricks_connection() -> None:
+    """Open a pooled connection to the workspace (DNS + TCP + TLS) so the first run lookup skips the handshake"""
+    if not _HOST:
+        return
+    try:
+        _session.head(_HOST, timeout=_API_TIMEOUT)
+        logger.info("Databricks connection warmed")
+    except requests.RequestException as e:
+        logger.warning(f"Could not warm Databricks connection: {e}")
+
+# Short-lived cache of successful run lookups. Databricks retries webhook deliveries and a
+# job failure can be reported by more than one notification, so the same run_id is often
+# looked up several times within seconds. A per-run_id lock makes concurrent lookups share
+# one API round-trip (single-flight). Each lock entry is [lock, users] and is dropped when its
+# last user leaves, so the registry only ever holds run_ids with a lookup in progress.
+# Every cache and registry access holds _run_locks_guard. The TTL is fixed, so the dict's
+# insertion order is expiry order: expired entries are trimmed from the front on insert and
+# the size is capped, which keeps each operation O(1) amortized.
+RUN_DETAILS_CACHE_TTL = float(os.getenv("DATABRICKS_RUN_CACHE_TTL_SECONDS", "30"))
+RUN_DETAILS_CACHE_MAX = 1024
+_run_details_cache: Dict[str, tuple] = {}
+_run_locks: Dict[str, list] = {}
+_run_locks_guard = threading.Lock()
+
+
+def _run_cache_get(key: str) -> Optional[Dict]:
+    with _run_locks_guard:
+        hit = _run_details_cache.get(key)
+        if hit is None:
+            return None
+        if hit[0] <= time.monotonic():
+            del _run_details_cache[key]
+            return None
+        return hit[1]
+
+
+def _run_cache_put(key: str, data: Dict) -> None:
+    with _run_locks_guard:
+        now = time.monotonic()
+        _run_details_cache.pop(key, None)
+        while _run_details_cache:
+            oldest = next(iter(_run_details_cache))
+            if _run_details_cache[oldest][0] > now and len(_run_details_cache) < RUN_DETAILS_CACHE_MAX:
+                break
+            del _run_details_cache[oldest]
+        _run_details_cache[key] = (now + RUN_DETAILS_CACHE_TTL, data)
+
+
 def fetch_databricks_run_details(run_id: str) -> Optional[Dict]:
+    """Cached/single-flight wrapper around _fetch_run_details (failed lookups are not cached)."""
+    key = str(run_id)
+    data = _run_cache_get(key)
+    if data is not None:
+        return data
+    with _run_locks_guard:
+        entry = _run_locks.setdefault(key, [threading.Lock(), 0])
+        entry[1] += 1
+    try:
+        with entry[0]:
+            data = _run_cache_get(key)
+            if data is not None:
+                return data
+            data = _fetch_run_details(key)
+            if data is not None and RUN_DETAILS_CACHE_TTL > 0:
+                _run_cache_put(key, data)
+            return data
+    finally:
+        with _run_locks_guard:
+            entry[1] -= 1
+            if entry[1] == 0:
+                _run_locks.pop(key, None)
+
+
+def _fetch_run_details(run_id: str) -> Optional[Dict]:
     """
     Fetch detailed run information from Databricks Jobs API.
 
@@ -66,40 +231,28 @@ def fetch_databricks_run_details(run_id: str) -> Optional[Dict]:
         logger.error("=" * 80)
         return None
     
-    # Remove trailing slash from host
-    host = DATABRICKS_HOST.rstrip('/')
-    
-    # Databricks Jobs API endpoint
-    url = f"{host}/api/2.1/jobs/runs/get"
-    
-    headers = {
-        "Authorization": f"Bearer {DATABRICKS_TOKEN}",
-        "Content-Type": "application/json"
-    }
-    
     params = {"run_id": run_id}
     
     try:
         logger.info(f"Fetching Databricks run details for run_id: {run_id}")
-        response = requests.get(url, headers=headers, params=params, timeout=10)
+        response = _api_get(_RUNS_GET_URL, params)
         
         if response.status_code == 200:
-            data = response.json()
+            data = orjson.loads(response.content)
             logger.info(f"Successfully fetched run details for {run_id}")
             
-            # **ENHANCEMENT: Fetch task outputs for real error messages**
-            tasks = data.get("tasks", [])
-            for task in tasks:
-                if task.get("state", {}).get("result_state") == "FAILED":
-                    task_run_id = task.get("run_id")
-                    if task_run_id:
-                        try:
-                            task_output = fetch_task_output(task_run_id)
-                            if task_output:
-                                task["run_output"] = task_output
-                                logger.info(f"Fetched run output for task {task.get('task_key')}")
-                        except Exception as e:
-                            logger.warning(f"Could not fetch task output for {task_run_id}: {e}")
+            # **ENHANCEMENT: Fetch task outputs for real error messages** (all failed tasks in parallel)
+            failed_tasks = [task for task in data.get("tasks", [])
+                            if task.get("state", {}).get("result_state") == "FAILED" and task.get("run_id")]
+            pending = [(task, _task_output_pool.submit(fetch_task_output, task["run_id"])) for task in failed_tasks]
+            for task, future in pending:
+                try:
+                    task_output = future.result()
+                    if task_output:
+                        task["run_output"] = task_output
+                        logger.info(f"Fetched run output for task {task.get('task_key')}")
+                except Exception as e:
+                    logger.warning(f"Could not fetch task output for {task.get('run_id')}: {e}")
             
             # Extract the most relevant error message
             error_message = extract_error_message(data)
@@ -129,20 +282,12 @@ def fetch_task_output(task_run_id: str) -> Optional[Dict]:
     if not DATABRICKS_HOST or not DATABRICKS_TOKEN:
         return None
     
-    host = DATABRICKS_HOST.rstrip('/')
-    url = f"{host}/api/2.1/jobs/runs/get-output"
-    
-    headers = {
-        "Authorization": f"Bearer {DATABRICKS_TOKEN}",
-        "Content-Type": "application/json"
-    }
-    
     params = {"run_id": task_run_id}
     
     try:
-        response = requests.get(url, headers=headers, params=params, timeout=10)
+        response = _api_get(_RUNS_GET_OUTPUT_URL, params)
         if response.status_code == 200:
-            return response.json()
+            return orjson.loads(response.content)
         else:
             logger.warning(f"Could not fetch task output. Status: {response.status_code}")
             return None
@@ -260,8 +405,7 @@ def get_cluster_logs_url(run_data: Dict) -> Optional[str]:
     cluster_id = cluster_instance.get("cluster_id")
     
     if cluster_id and DATABRICKS_HOST:
-        host = DATABRICKS_HOST.rstrip('/')
-        return f"{host}/#/setting/clusters/{cluster_id}/sparkUi"
+        return f"{_HOST}/#/setting/clusters/{cluster_id}/sparkUi"
     
     return None
 
@@ -279,8 +423,7 @@ def get_run_page_url(run_data: Dict) -> Optional[str]:
     run_id = run_data.get("run_id")
     
     if run_id and DATABRICKS_HOST:
-        host = DATABRICKS_HOST.rstrip('/')
-        return f"{host}/#job/{run_data.get('job_id')}/run/{run_id}"
+        return f"{_HOST}/#job/{run_data.get('job_id')}/run/{run_id}"
     
     return None
 
@@ -2,11 +2,15 @@
 Error extraction utilities for different services
 Each service has its own extraction logic
 """
+import re
 import logging
 from typing import Dict, Optional, Tuple
 
 logger = logging.getLogger("error_extractors")
 
+# Logic App forwarding wrapper: "...ErrorMessage=<real error> Forwarded to RCA system..."
+_FORWARDED_RE = re.compile(r"(ErrorMessage|Message)=(.+)(?=Forwarded to RCA system)", re.IGNORECASE | re.DOTALL)
+
 
 class AzureDataFactoryExtractor:
     """Extract error details from ADF webhook payloads"""
@@ -85,9 +89,7 @@ class AzureDataFactoryExtractor:
 
         # Clean up Logic App forwarding messages
         if "forwarded to rca system" in error_message.lower():
-            import re
-            match = re.search(r"(ErrorMessage|Message)=(.+)(?=Forwarded to RCA system)",
-                            error_message, re.IGNORECASE | re.DOTALL)
+            match = _FORWARDED_RE.search(error_message)
             if match:
                 error_message = match.group(2).strip().strip("'")
 
@@ -1,22 +1,28 @@
 # main.py - COMPLETE VERSION WITH PARALLEL PIPELINE SUPPORT & DEDUPLICATION
 import os
-import json
+import orjson
 import uuid
 import logging
 import re
 import requests
 import time
+import random
 import asyncio
 import hmac
 import hashlib
+import functools
+import queue
+import zlib
+import base64
 from datetime import datetime, timezone, timedelta
-from typing import Optional, List, Dict
+from typing import Optional, List, Dict, Union
 from io import BytesIO, StringIO
 import csv
 from requests.auth import HTTPBasicAuth
+from requests.adapters import HTTPAdapter
 
-from fastapi import FastAPI, Request, Header, HTTPException, WebSocket, WebSocketDisconnect, Query, Depends, Response
-from fastapi.responses import HTMLResponse, JSONResponse, RedirectResponse, StreamingResponse
+from fastapi import FastAPI, Request, Header, HTTPException, WebSocket, WebSocketDisconnect, Query, Depends, Response, BackgroundTasks
+from fastapi.responses import HTMLResponse, ORJSONResponse, RedirectResponse, StreamingResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from pydantic import BaseModel, EmailStr, validator
 from dotenv import load_dotenv
@@ -25,10 +31,12 @@ import jwt
 from passlib.context import CryptContext
 
 from sqlalchemy import create_engine, text
+from sqlalchemy.sql.elements import TextClause
 from urllib.parse import quote_plus
 
 # Databricks API utilities
-from databricks_api_utils import fetch_databricks_run_details, extract_error_message
+from databricks_api_utils import fetch_databricks_run_details, extract_error_message, warm_databricks_connection
+from circuit_breaker import get_breaker, CircuitBreakerError, BulkheadFullError
 
 # Azure Blob Storage imports
 try:
@@ -80,6 +88,7 @@ JIRA_USER_EMAIL = os.getenv("JIRA_USER_EMAIL", "")
 JIRA_API_TOKEN = os.getenv("JIRA_API_TOKEN", "")
 JIRA_PROJECT_KEY = os.getenv("JIRA_PROJECT_KEY", "")
 JIRA_WEBHOOK_SECRET = os.getenv("JIRA_WEBHOOK_SECRET", "")
+_JIRA_WEBHOOK_SECRET_BYTES = JIRA_WEBHOOK_SECRET.encode("utf-8")
 
 # --- PLAYBOOK REGISTRY ---
 PLAYBOOK_REGISTRY: Dict[str, Optional[str]] = {
@@ -94,6 +103,40 @@ PLAYBOOK_REGISTRY: Dict[str, Optional[str]] = {
     "DatabricksPermissionDenied": os.getenv("PLAYBOOK_CHECK_PERMISSIONS"),
 }
 
+# --- Circuit Breaker Config (per upstream host) ---
+CIRCUIT_BREAKER_FAIL_MAX = int(os.getenv("CIRCUIT_BREAKER_FAIL_MAX", "5"))
+CIRCUIT_BREAKER_RESET_TIMEOUT = int(os.getenv("CIRCUIT_BREAKER_RESET_TIMEOUT", "30"))
+HTTP_BULKHEAD_MAX_CONCURRENCY = int(os.getenv("HTTP_BULKHEAD_MAX_CONCURRENCY", "10"))
+# A call that finds the bulkhead full waits this long for a slot, and is retried this many times
+# in total, before it is given up: a busy host delays notifications rather than dropping them
+HTTP_BULKHEAD_WAIT_SECONDS = float(os.getenv("HTTP_BULKHEAD_WAIT_SECONDS", "5"))
+HTTP_BULKHEAD_MAX_ATTEMPTS = int(os.getenv("HTTP_BULKHEAD_MAX_ATTEMPTS", "3"))
+# Connect timeout for outbound calls, separate from each call's read timeout: an unreachable
+# host fails in seconds instead of holding a bulkhead slot and a worker thread for the full read budget
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "3.05"))
+
+_breaker_kwargs = dict(fail_max=CIRCUIT_BREAKER_FAIL_MAX, reset_timeout=CIRCUIT_BREAKER_RESET_TIMEOUT,
+                       max_concurrency=HTTP_BULKHEAD_MAX_CONCURRENCY, bulkhead_wait=HTTP_BULKHEAD_WAIT_SECONDS)
+slack_breaker = get_breaker("slack.com", **_breaker_kwargs)
+jira_breaker = get_breaker("jira", **_breaker_kwargs)
+
+# Shared keep-alive session for outbound Slack / Jira calls, so repeat calls
+# to the same host reuse the pooled TLS connection instead of handshaking every time.
+http_session = requests.Session()
+_http_adapter = HTTPAdapter(pool_connections=8, pool_maxsize=HTTP_BULKHEAD_MAX_CONCURRENCY)
+http_session.mount("https://", _http_adapter)
+http_session.mount("http://", _http_adapter)
+
+def _breaker_call(breaker, func, *args, **kwargs):
+    """breaker.call, retried with jittered backoff while the host's bulkhead stays full"""
+    for attempt in range(1, HTTP_BULKHEAD_MAX_ATTEMPTS + 1):
+        try:
+            return breaker.call(func, *args, **kwargs)
+        except BulkheadFullError:
+            if attempt == HTTP_BULKHEAD_MAX_ATTEMPTS:
+                raise
+            time.sleep(attempt * random.uniform(0.5, 1.5))
+
 logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
 logger = logging.getLogger("aiops_rca")
 
@@ -146,6 +189,17 @@ def get_engine_with_retry(retries: int = 3, backoff: int = 3):
     return eng
 
 engine = get_engine_with_retry()
+# Dialect of the engine actually in use: DB_TYPE=azuresql falls back to SQLite when Azure SQL
+# is unreachable, so dialect-specific SQL is chosen from this, not from DB_TYPE
+IS_SQLITE = engine.dialect.name == "sqlite"
+
+QUERY_INDEXES = {
+    "idx_tickets_status_ts": "tickets(status, timestamp DESC)",
+    "idx_tickets_status_ackts": "tickets(status, ack_ts DESC)",
+    "idx_tickets_itsm": "tickets(itsm_ticket_id)",
+    "idx_audit_timestamp": "audit_trail(timestamp DESC)",
+    "idx_audit_action_ts": "audit_trail(action, timestamp DESC)",
+}
 
 def init_db():
     with engine.begin() as conn:
@@ -283,20 +337,126 @@ def init_db():
         except Exception as e:
             logger.warning(f"Could not create/update unique index: {e}")
 
+        # Indexes for the dashboard list / audit queries (WHERE status/action ... ORDER BY ts DESC)
+        # and the Jira webhook lookup by itsm_ticket_id
+        created_indexes = False
+        if IS_SQLITE:
+            existing = {r[0] for r in conn.execute(text("SELECT name FROM sqlite_master WHERE type = 'index'"))}
+        for idx_name, idx_def in QUERY_INDEXES.items():
+            try:
+                if IS_SQLITE:
+                    if idx_name not in existing:
+                        conn.execute(text(f"CREATE INDEX {idx_name} ON {idx_def}"))
+                        created_indexes = True
+                else:
+                    conn.execute(text(f"""
+                        IF NOT EXISTS (SELECT * FROM sys.indexes WHERE name = '{idx_name}')
+                        BEGIN
+                            CREATE INDEX {idx_name} ON {idx_def}
+                        END
+                    """))
+            except Exception as e:
+                logger.warning(f"Could not create index {idx_name}: {e}")
+
+        # Refresh planner statistics once, when the indexes are first created, so SQLite actually
+        # picks them (Azure SQL auto-updates stats). Not on every start: ANALYZE scans every table.
+        if created_indexes:
+            try:
+                conn.execute(text("ANALYZE"))
+            except Exception as e:
+                logger.debug(f"ANALYZE failed: {e}")
+
 init_db()
 
-def db_execute(q: str, params: Optional[dict] = None):
+def _stmt(q: Union[str, TextClause]) -> TextClause:
+    """Accept raw SQL or a text() statement prepared once at import."""
+    return text(q) if isinstance(q, str) else q
+
+def db_execute(q: Union[str, TextClause], params: Optional[dict] = None):
     params = params or {}
     with engine.begin() as conn:
-        conn.execute(text(q), params)
+        conn.execute(_stmt(q), params)
 
-def db_query(q: str, params: Optional[dict] = None, one: bool = False):
+def db_query(q: Union[str, TextClause], params: Optional[dict] = None, one: bool = False):
     params = params or {}
     with engine.connect() as conn:
-        result = conn.execute(text(q), params)
+        result = conn.execute(_stmt(q), params)
         rows = [dict(r._mapping) for r in result.fetchall()]
     return rows[0] if one and rows else rows
 
+def db_query_json(q: Union[str, TextClause], params: Optional[dict] = None) -> bytes:
+    """Run a query that returns JSON text (split across rows, as FOR JSON does) and return it as bytes."""
+    with engine.connect() as conn:
+        parts = [r[0] for r in conn.execute(_stmt(q), params or {}) if r[0]]
+    return "".join(parts).encode("utf-8") if parts else b"[]"
+
+def db_stream(q: Union[str, TextClause], params: Optional[dict] = None, batch_size: int = 1000, as_dict: bool = True):
+    """Yield rows one at a time from a server-side cursor, fetching `batch_size` rows per round-trip.
+    With as_dict=False the positional Row tuples are yielded as-is."""
+    params = params or {}
+    with engine.connect() as conn:
+        result = conn.execution_options(stream_results=True, yield_per=batch_size).execute(_stmt(q), params)
+        if not as_dict:
+            yield from result
+            return
+        for r in result:
+            yield dict(r._mapping)
+
+# --- Known run_id cache (deduplication fast path) ---
+# In-memory set of every run_id in the tickets table, loaded on startup and updated on insert.
+# A miss means "definitely no ticket"; a hit still goes to the DB for the ticket details.
+# The set is per-process, so a run_id inserted by another worker or instance would be a false
+# "no ticket". Off by default; enable only for a single-process deployment.
+RUN_ID_CACHE_ENABLED = os.getenv("RUN_ID_CACHE_ENABLED", "false").lower() in ("1", "true", "yes")
+RUN_ID_CACHE_MAX = int(os.getenv("RUN_ID_CACHE_MAX", "200000"))
+_known_run_ids: set = set()
+_run_id_cache_ready = False
+
+def _load_known_run_ids():
+    global _run_id_cache_ready
+    if not RUN_ID_CACHE_ENABLED:
+        return
+    total = db_query("SELECT COUNT(*) AS count FROM tickets WHERE run_id IS NOT NULL", one=True)
+    if total and total.get("count", 0) > RUN_ID_CACHE_MAX:
+        logger.warning("run_id cache disabled: %s tickets exceed RUN_ID_CACHE_MAX=%s", total["count"], RUN_ID_CACHE_MAX)
+        return
+    with engine.connect() as conn:
+        _known_run_ids.update(r[0] for r in conn.execute(text("SELECT run_id FROM tickets WHERE run_id IS NOT NULL")))
+    _run_id_cache_ready = True
+    logger.info("Loaded %d known run_ids for deduplication", len(_known_run_ids))
+
+def _remember_run_id(run_id):
+    if run_id:
+        _known_run_ids.add(str(run_id))
+
+def _run_id_may_exist(run_id) -> bool:
+    """Returns False only when no ticket can exist for this run_id."""
+    return not _run_id_cache_ready or str(run_id) in _known_run_ids
+
+# --- Dashboard response cache ---
+# Short-lived in-process cache for the dashboard aggregate endpoints, cleared whenever a
+# ticket is created or changes status and whenever audit rows are written (both aggregates
+# include audit counts). Never used for per-ticket or per-user data.
+# The cache and its invalidation are per-process: with several workers or instances, a change
+# only clears the cache of the worker that made it, so the other workers can serve summaries up
+# to DASHBOARD_CACHE_TTL old. Set DASHBOARD_CACHE_TTL_SECONDS=0 where that is not acceptable.
+DASHBOARD_CACHE_TTL = float(os.getenv("DASHBOARD_CACHE_TTL_SECONDS", "30"))
+_dashboard_cache: Dict[str, tuple] = {}
+
+def _dashboard_cache_get(key: str):
+    hit = _dashboard_cache.get(key)
+    if hit and hit[0] > time.monotonic():
+        return hit[1]
+    return None
+
+def _dashboard_cache_set(key: str, value):
+    if DASHBOARD_CACHE_TTL > 0:
+        _dashboard_cache[key] = (time.monotonic() + DASHBOARD_CACHE_TTL, value)
+    return value
+
+def invalidate_dashboard_cache():
+    _dashboard_cache.clear()
+
 # --- Authentication Helper Functions ---
 def hash_password(password: str) -> str:
     password_bytes = password.encode('utf-8')[:72]
@@ -370,33 +530,122 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
     return user
 
 # --- Audit Trail Helper Functions ---
+# Audit rows are queued and written in batches (one executemany per flush) by a background
+# task started on app startup. The first queued row wakes the writer, which waits
+# AUDIT_FLUSH_INTERVAL for more rows to coalesce. Until that task runs, and for
+# critical=True entries, log_audit writes synchronously.
+AUDIT_FLUSH_INTERVAL = float(os.getenv("AUDIT_FLUSH_INTERVAL_MS", "50")) / 1000
+AUDIT_BATCH_SIZE = int(os.getenv("AUDIT_BATCH_SIZE", "256"))
+_AUDIT_INSERT_SQL = """
+    INSERT INTO audit_trail 
+    (timestamp, ticket_id, pipeline, run_id, action, user_name, user_empid, 
+     time_taken_seconds, mttr_minutes, sla_status, rca_summary, finops_team, 
+     finops_owner, details, itsm_ticket_id)
+    VALUES 
+    (:timestamp, :ticket_id, :pipeline, :run_id, :action, :user_name, :user_empid,
+     :time_taken, :mttr, :sla_status, :rca_summary, :finops_team, :finops_owner, :details, :itsm_ticket_id)
+"""
+# SimpleQueue (not asyncio.Queue) because log_audit is also called from worker threads
+_AUDIT_Q: "queue.SimpleQueue[dict]" = queue.SimpleQueue()
+_audit_writer_task: Optional[asyncio.Task] = None
+_audit_wakeup: Optional[asyncio.Event] = None
+_audit_loop: Optional[asyncio.AbstractEventLoop] = None
+
+def _write_audit_rows(rows: List[dict]):
+    with engine.begin() as conn:
+        conn.execute(text(_AUDIT_INSERT_SQL), rows)
+    invalidate_dashboard_cache()
+
+def _drain_audit_queue(limit: int) -> List[dict]:
+    batch = []
+    while len(batch) < limit:
+        try:
+            batch.append(_AUDIT_Q.get_nowait())
+        except queue.Empty:
+            break
+    return batch
+
+async def _flush_audit_queue():
+    """Write everything currently queued, AUDIT_BATCH_SIZE rows per transaction."""
+    while True:
+        batch = _drain_audit_queue(AUDIT_BATCH_SIZE)
+        if not batch:
+            return
+        try:
+            await asyncio.to_thread(_write_audit_rows, batch)
+            logger.info(f"Audit logged: {len(batch)} entries")
+        except Exception as e:
+            logger.error(f"Failed to log {len(batch)} audit entries: {e}")
+
+async def _audit_writer():
+    while True:
+        await _audit_wakeup.wait()
+        await asyncio.sleep(AUDIT_FLUSH_INTERVAL)
+        _audit_wakeup.clear()
+        await _flush_audit_queue()
+
 def log_audit(ticket_id: str, action: str, pipeline: str = None, run_id: str = None, 
               user_name: str = None, user_empid: str = None, time_taken_seconds: int = None,
               mttr_minutes: float = None, sla_status: str = None, rca_summary: str = None,
               finops_team: str = None, finops_owner: str = None, details: str = None,
-              itsm_ticket_id: str = None):
-    """Log audit trail entry to database with ITSM ticket ID"""
+              itsm_ticket_id: str = None, timestamp: str = None, critical: bool = False):
+    """Log audit trail entry to database with ITSM ticket ID (timestamp defaults to now, UTC ISO-8601).
+    critical=True bypasses the batch queue and commits before returning."""
+    row = {
+        "timestamp": timestamp or datetime.now(timezone.utc).isoformat(),
+        "ticket_id": ticket_id, "pipeline": pipeline, "run_id": run_id,
+        "action": action, "user_name": user_name, "user_empid": user_empid,
+        "time_taken": time_taken_seconds, "mttr": mttr_minutes, "sla_status": sla_status,
+        "rca_summary": rca_summary, "finops_team": finops_team, "finops_owner": finops_owner,
+        "details": details, "itsm_ticket_id": itsm_ticket_id
+    }
+    if _audit_writer_task is not None and not critical:
+        _AUDIT_Q.put(row)
+        if not _audit_wakeup.is_set():
+            # Thread-safe: log_audit is also called from asyncio.to_thread workers
+            _audit_loop.call_soon_threadsafe(_audit_wakeup.set)
+        logger.debug(f"Audit queued: {action} for {ticket_id}")
+        return
     try:
-        timestamp = datetime.utcnow().replace(tzinfo=timezone.utc).isoformat()
-        db_execute("""
-            INSERT INTO audit_trail 
-            (timestamp, ticket_id, pipeline, run_id, action, user_name, user_empid, 
-             time_taken_seconds, mttr_minutes, sla_status, rca_summary, finops_team, 
-             finops_owner, details, itsm_ticket_id)
-            VALUES 
-            (:timestamp, :ticket_id, :pipeline, :run_id, :action, :user_name, :user_empid,
-             :time_taken, :mttr, :sla_status, :rca_summary, :finops_team, :finops_owner, :details, :itsm_ticket_id)
-        """, {
-            "timestamp": timestamp, "ticket_id": ticket_id, "pipeline": pipeline, "run_id": run_id,
-            "action": action, "user_name": user_name, "user_empid": user_empid,
-            "time_taken": time_taken_seconds, "mttr": mttr_minutes, "sla_status": sla_status,
-            "rca_summary": rca_summary, "finops_team": finops_team, "finops_owner": finops_owner,
-            "details": details, "itsm_ticket_id": itsm_ticket_id
-        })
+        _write_audit_rows([row])
         logger.info(f"Audit logged: {action} for {ticket_id}")
     except Exception as e:
         logger.error(f"Failed to log audit: {e}")
 
+# --- Payload Helpers ---
+@functools.lru_cache(maxsize=256)
+def _split_path(path: str) -> tuple:
+    return tuple(path.split("."))
+
+def first(d: dict, *paths: str, default=None):
+    """Return the first truthy value found at any dotted path in `d` (e.g. "run.state.state_message")."""
+    for path in paths:
+        value = d
+        for key in _split_path(path):
+            value = value.get(key) if isinstance(value, dict) else None
+            if value is None:
+                break
+        if value:
+            return value
+    return default
+
+def _trunc(d: dict, key: str, n: int = 200) -> str:
+    """Return d[key] cut to `n` chars, or "" when missing/empty (single lookup)."""
+    v = d.get(key)
+    return v[:n] if v else ""
+
+# (epoch second, "YYYYmmdd_HHMMSS", "YYYY-mm-ddTHH:MM:SSZ"), rebuilt at most once per second
+_TS_CACHE: tuple = (0, "", "")
+
+def now_strings() -> tuple:
+    """Current UTC time as (filename stamp, ISO-8601 'Z' string) at one-second resolution."""
+    global _TS_CACHE
+    sec = int(time.time())
+    if sec != _TS_CACHE[0]:
+        now = datetime.fromtimestamp(sec, timezone.utc)
+        _TS_CACHE = (sec, now.strftime("%Y%m%d_%H%M%S"), now.strftime("%Y-%m-%dT%H:%M:%SZ"))
+    return _TS_CACHE[1], _TS_CACHE[2]
+
 # --- Blob Upload Helper Function ---
 def upload_payload_to_blob(ticket_id: str, payload: dict) -> Optional[str]:
     """Uploads the raw payload to Azure Blob Storage and logs to audit trail."""
@@ -405,7 +654,7 @@ def upload_payload_to_blob(ticket_id: str, payload: dict) -> Optional[str]:
     try:
         blob_name = f"{datetime.utcnow().strftime('%Y-%m-%d')}/{ticket_id}-payload.json"
         blob_client = blob_service_client.get_blob_client(container=AZURE_BLOB_CONTAINER_NAME, blob=blob_name)
-        payload_bytes = json.dumps(payload, indent=2).encode('utf-8')
+        payload_bytes = orjson.dumps(payload, option=orjson.OPT_INDENT_2)
         with BytesIO(payload_bytes) as data_stream:
             blob_client.upload_blob(data_stream, overwrite=True)
         url = blob_client.url
@@ -419,6 +668,11 @@ def upload_payload_to_blob(ticket_id: str, payload: dict) -> Optional[str]:
 
 def extract_finops_tags(resource_name: str, resource_type: str = "adf"):
     """Extract FinOps tags from ADF pipeline or Databricks job/cluster name"""
+    return dict(_extract_finops_tags_cached(resource_name, resource_type))
+
+@functools.lru_cache(maxsize=4096)
+def _extract_finops_tags_cached(resource_name: str, resource_type: str):
+    """Cached tag derivation; pipeline/job names repeat heavily across alerts. Callers get a copy."""
     tags = {"team": "Unknown", "owner": "Unknown", "cost_center": "Unknown"}
     if not resource_name: return tags
     resource_lower = resource_name.lower()
@@ -522,7 +776,7 @@ Error Message:
         model = genai.GenerativeModel(MODEL_ID)
         resp = model.generate_content(prompt)
         text = resp.text.strip().strip("`").replace("json", "").strip()
-        return json.loads(text)
+        return orjson.loads(text)
     except Exception as e:
         logger.warning("Gemini RCA failed: %s", e)
         return None
@@ -557,9 +811,28 @@ def generate_rca_and_recs(desc, source_type="adf"):
     logger.warning("AI RCA failed for %s. Using fallback.", source_type.upper())
     return fallback_rca(desc, source_type)
 
+# --- Ingest Helper: blob upload + RCA in parallel ---
+async def _upload_blob_and_generate_rca(tid: str, payload: dict, desc: str, source_type: str = "adf"):
+    """Run the blob upload and the AI RCA concurrently (they are independent); returns (blob_url, rca)."""
+    blob_coro = asyncio.to_thread(upload_payload_to_blob, tid, payload) if AZURE_BLOB_ENABLED else asyncio.sleep(0)
+    rca_coro = asyncio.to_thread(generate_rca_and_recs, desc, source_type)
+    blob_url, rca = await asyncio.gather(blob_coro, rca_coro, return_exceptions=True)
+    if isinstance(blob_url, BaseException):
+        logger.error("Blob upload thread task failed: %s", blob_url)
+        blob_url = None
+    if isinstance(rca, BaseException):
+        logger.warning("RCA thread task failed for %s: %s. Using fallback.", source_type.upper(), rca)
+        rca = fallback_rca(desc, source_type)
+    return blob_url, rca
+
 # --- ITSM Integration Functions ---
+# Jira endpoint/headers are fixed for the process lifetime; resolve them once
+_JIRA_ISSUE_URL = f"{JIRA_DOMAIN}/rest/api/3/issue"
+_JIRA_HEADERS = {"Accept": "application/json", "Content-Type": "application/json"}
+
+@functools.lru_cache(maxsize=1)
 def _get_jira_auth() -> Optional[HTTPBasicAuth]:
-    """Returns Jira auth object if configured."""
+    """Returns Jira auth object if configured (built once, credentials come from env at import)."""
     if JIRA_USER_EMAIL and JIRA_API_TOKEN:
         return HTTPBasicAuth(JIRA_USER_EMAIL, JIRA_API_TOKEN)
     return None
@@ -569,8 +842,6 @@ def create_jira_ticket(ticket_id: str, pipeline: str, rca_data: dict, finops: di
     if not (JIRA_DOMAIN and auth and JIRA_PROJECT_KEY):
         logger.warning("Jira settings are incomplete. Skipping ticket creation.")
         return None
-    url = f"{JIRA_DOMAIN}/rest/api/3/issue"
-    headers = {"Accept": "application/json", "Content-Type": "application/json"}
     description_adf = {
         "type": "doc", "version": 1, "content": [
             {"type": "heading", "attrs": {"level": 2}, "content": [{"type": "text", "text": "AIOps RCA Details"}]},
@@ -587,13 +858,13 @@ def create_jira_ticket(ticket_id: str, pipeline: str, rca_data: dict, finops: di
             {"type": "heading", "attrs": {"level": 3}, "content": [{"type": "text", "text": "Ticket Details"}]},
             {"type": "codeBlock", "attrs": {"language": "json"}, "content": [{
                 "type": "text",
-                "text": json.dumps({
+                "text": orjson.dumps({
                     "AIOps_Ticket_ID": ticket_id, "Pipeline_Name": pipeline, "ADF_Run_ID": run_id,
                     "Severity": rca_data.get('severity', 'N/A'), "Priority": rca_data.get('priority', 'N/A'),
                     "Error_Type": rca_data.get('error_type', 'N/A'), "Affected_Entity": rca_data.get('affected_entity', 'N/A'),
                     "FinOps_Team": finops.get('team', 'N/A'), "FinOps_Owner": finops.get('owner', 'N/A'),
                     "FinOps_Cost_Center": finops.get('cost_center', 'N/A')
-                }, indent=2)
+                }, option=orjson.OPT_INDENT_2).decode()
             }]}
         ]
     }
@@ -606,7 +877,7 @@ def create_jira_ticket(ticket_id: str, pipeline: str, rca_data: dict, finops: di
         }
     }
     try:
-        r = requests.post(url, headers=headers, data=json.dumps(payload), auth=auth, timeout=20)
+        r = _breaker_call(jira_breaker, http_session.post, _JIRA_ISSUE_URL, headers=_JIRA_HEADERS, data=orjson.dumps(payload), auth=auth, timeout=(HTTP_CONNECT_TIMEOUT, 20))
         if r.status_code == 201:
             jira_key = r.json().get('key')
             logger.info(f"Successfully created Jira ticket: {jira_key}")
@@ -614,14 +885,55 @@ def create_jira_ticket(ticket_id: str, pipeline: str, rca_data: dict, finops: di
         else:
             logger.error(f"ailed to create Jira ticket. Status: {r.status_code}, Response: {r.text}")
             return None
+    except BulkheadFullError as e:
+        logger.warning(f"Jira ticket creation gave up, bulkhead full: {e}")
+        log_audit(ticket_id=ticket_id, action="Jira Ticket Failed (bulkhead full)", pipeline=pipeline, run_id=run_id,
+                  details=str(e))
+        return None
+    except CircuitBreakerError as e:
+        logger.warning(f"Jira ticket creation skipped: {e}")
+        log_audit(ticket_id=ticket_id, action="Jira Ticket Skipped (breaker open)", pipeline=pipeline, run_id=run_id,
+                  details=str(e))
+        return None
     except Exception as e:
         logger.error(f"Exception while creating Jira ticket: {e}")
         return None
 
 # --- FastAPI App ---
-app = FastAPI(title="AIOps RCA Assistant")
+app = FastAPI(title="AIOps RCA Assistant", default_response_class=ORJSONResponse)
 app.add_middleware(CORSMiddleware, allow_origins=["*"], allow_credentials=True, allow_methods=["*"], allow_headers=["*"])
 
+@app.on_event("startup")
+async def load_run_id_cache():
+    try:
+        await asyncio.to_thread(_load_known_run_ids)
+    except Exception as e:
+        logger.warning(f"Could not load run_id cache, deduplication will query the DB: {e}")
+
+@app.on_event("startup")
+async def warm_outbound_connections():
+    # In the background so startup does not wait on the network
+    asyncio.create_task(asyncio.to_thread(warm_databricks_connection))
+
+@app.on_event("startup")
+async def start_audit_writer():
+    global _audit_writer_task, _audit_wakeup, _audit_loop
+    _audit_wakeup = asyncio.Event()
+    _audit_loop = asyncio.get_running_loop()
+    _audit_writer_task = asyncio.create_task(_audit_writer())
+
+@app.on_event("shutdown")
+async def stop_audit_writer():
+    global _audit_writer_task
+    if _audit_writer_task is not None:
+        _audit_writer_task.cancel()
+        _audit_writer_task = None
+    await _flush_audit_queue()
+
+@app.on_event("shutdown")
+async def close_http_session():
+    http_session.close()
+
 # --- WebSocket manager ---
 class ConnectionManager:
     def __init__(self):
@@ -633,16 +945,42 @@ class ConnectionManager:
         if websocket in self.active_connections:
             self.active_connections.remove(websocket)
     async def broadcast(self, message: dict):
-        dead = []
-        for conn in list(self.active_connections):
-            try: await conn.send_json(message)
-            except WebSocketDisconnect: dead.append(conn)
-        for d in dead: self.disconnect(d)
+        # Encode once for all clients; sent as a text frame because the dashboard JSON.parse()s evt.data
+        data = orjson.dumps(message).decode()
+        conns = list(self.active_connections)
+        results = await asyncio.gather(*(conn.send_text(data) for conn in conns), return_exceptions=True)
+        for conn, res in zip(conns, results):
+            if isinstance(res, Exception): self.disconnect(conn)
 manager = ConnectionManager()
 
 # --- Slack helpers ---
-def post_slack_notification(ticket_id: str, essentials: dict, rca: dict, itsm_ticket_id: str = None):
-    if not SLACK_BOT_TOKEN: return None
+# Static parts of every Slack message, built once at import
+_SLACK_HEADERS = {"Authorization": f"Bearer {SLACK_BOT_TOKEN}", "Content-type": "application/json; charset=utf-8"}
+_SLACK_DIVIDER_BLOCK = {"type": "divider"}
+_SLACK_DASHBOARD_BLOCK = {
+    "type": "actions",
+    "elements": [{"type": "button", "text": {"type": "plain_text", "text": "Open in Dashboard"},
+                  "url": f"{PUBLIC_BASE_URL.rstrip('/')}/dashboard", "style": "primary"}]
+}
+
+def _slack_text_block(text: str, block_type: str = "section") -> dict:
+    return {"type": block_type, "text": {"type": "mrkdwn", "text": text}}
+
+def _build_slack_blocks(header: str, ticket_text: str, root_text: str, recs: list, context_text: str = None) -> list:
+    """Assemble alert/closed message blocks; only the per-ticket strings are formatted per call."""
+    blocks = [{"type": "header", "text": {"type": "plain_text", "text": header}}, _slack_text_block(ticket_text)]
+    if context_text:
+        blocks.append({"type": "context", "elements": [{"type": "mrkdwn", "text": context_text}]})
+        blocks.append(_SLACK_DIVIDER_BLOCK)
+    blocks.append(_slack_text_block(root_text))
+    if recs:
+        rec_text = "\n".join([f"* {r}" for r in recs])
+        blocks.append(_slack_text_block(f"*Resolution Steps:*\n{rec_text}"))
+    blocks.append(_SLACK_DASHBOARD_BLOCK)
+    return blocks
+
+def _alert_slack_message(ticket_id: str, essentials: dict, rca: dict, itsm_ticket_id: str = None) -> tuple:
+    """(blocks, fallback text) of the open-alert message"""
     title = essentials.get("alertRule") or essentials.get("pipelineName") or "ADF Alert"
     run_id = essentials.get("alertId") or essentials.get("runId") or "N/A"
     root = rca.get("root_cause")
@@ -652,25 +990,20 @@ def post_slack_notification(ticket_id: str, essentials: dict, rca: dict, itsm_ti
     confidence = rca.get("confidence", "Low")
     error_type = rca.get("error_type", "N/A")
     itsm_info = f"\n*ITSM Ticket:* `{itsm_ticket_id}`" if itsm_ticket_id else ""
-    blocks = [
-        {"type":"header","text":{"type":"plain_text","text":f"ALERT: {title} - {severity} ({priority})"}},
-        {"type":"section", "text": {"type":"mrkdwn", "text": f"*Ticket:* `{ticket_id}`{itsm_info}\n*Run ID:* `{run_id}`\n*Error Type:* `{error_type}`"}},
-        {"type":"section", "text": {"type":"mrkdwn", "text": f"*Root Cause:* {root}\n*Confidence:* {confidence}"}},
-    ]
-    if recs:
-        rec_text = "\n".join([f"* {r}" for r in recs])
-        blocks.append({"type":"section", "text": {"type":"mrkdwn", "text": f"*Resolution Steps:*\n{rec_text}"}})
-    dash_url = f"{PUBLIC_BASE_URL.rstrip('/')}/dashboard"
-    blocks.append({
-        "type":"actions",
-        "elements":[
-            {"type":"button","text":{"type":"plain_text","text":"Open in Dashboard"},"url":dash_url, "style": "primary"}
-        ]
-    })
-    payload = {"channel": SLACK_ALERT_CHANNEL, "blocks": blocks, "text": f"Ticket {ticket_id}: {title}"}
-    headers = {"Authorization": f"Bearer {SLACK_BOT_TOKEN}", "Content-type": "application/json; charset=utf-8"}
+    blocks = _build_slack_blocks(
+        header=f"ALERT: {title} - {severity} ({priority})",
+        ticket_text=f"*Ticket:* `{ticket_id}`{itsm_info}\n*Run ID:* `{run_id}`\n*Error Type:* `{error_type}`",
+        root_text=f"*Root Cause:* {root}\n*Confidence:* {confidence}",
+        recs=recs,
+    )
+    return blocks, f"Ticket {ticket_id}: {title}"
+
+def post_slack_notification(ticket_id: str, essentials: dict, rca: dict, itsm_ticket_id: str = None):
+    if not SLACK_BOT_TOKEN: return None
+    blocks, text = _alert_slack_message(ticket_id, essentials, rca, itsm_ticket_id)
+    payload = {"channel": SLACK_ALERT_CHANNEL, "blocks": blocks, "text": text}
     try:
-        r = requests.post("https://slack.com/api/chat.postMessage", headers=headers, json=payload, timeout=10)
+        r = _breaker_call(slack_breaker, http_session.post, "https://slack.com/api/chat.postMessage", headers=_SLACK_HEADERS, json=payload, timeout=(HTTP_CONNECT_TIMEOUT, 10))
         if r.status_code != 200:
             logger.warning("Slack post failed: %s %s", r.status_code, r.text)
             return None
@@ -680,67 +1013,201 @@ def post_slack_notification(ticket_id: str, essentials: dict, rca: dict, itsm_ti
         if ts and ch:
             db_execute("UPDATE tickets SET slack_ts=:ts, slack_channel=:ch WHERE id=:id", {"ts": ts, "ch": ch, "id": ticket_id})
         return j
+    except BulkheadFullError as e:
+        logger.warning("Slack post gave up, bulkhead full: %s", e)
+        log_audit(ticket_id=ticket_id, action="Slack Notification Failed (bulkhead full)", details=str(e))
+    except CircuitBreakerError as e:
+        logger.warning("Slack post skipped: %s", e)
+        log_audit(ticket_id=ticket_id, action="Slack Notification Skipped (breaker open)", details=str(e))
     except Exception as e:
         logger.warning("Slack post exception: %s", e)
     return None
 
-def update_slack_message_on_ack(ticket_id: str, user_name: str):
+def update_slack_alert_itsm(ticket_id: str, slack_result: dict, essentials: dict, rca: dict, itsm_ticket_id: str):
+    """Add the ITSM ticket key to an alert that was posted before the key existed (skipped once the ticket is closed)."""
+    if not (SLACK_BOT_TOKEN and slack_result.get("ts") and slack_result.get("channel")): return
+    row = db_query("SELECT status FROM tickets WHERE id=:id", {"id": ticket_id}, one=True)
+    if row and row.get("status") == "acknowledged":
+        return
+    blocks, text = _alert_slack_message(ticket_id, essentials, rca, itsm_ticket_id)
+    payload = {"channel": slack_result["channel"], "ts": slack_result["ts"], "blocks": blocks, "text": text}
+    try:
+        r = _breaker_call(slack_breaker, http_session.post, "https://slack.com/api/chat.update", headers=_SLACK_HEADERS, json=payload, timeout=(HTTP_CONNECT_TIMEOUT, 10))
+        if r.status_code != 200:
+            logger.warning("Slack ITSM update failed: %s %s", r.status_code, r.text)
+    except CircuitBreakerError as e:
+        logger.warning("Slack ITSM update skipped: %s", e)
+    except Exception as e:
+        logger.warning("Slack ITSM update exception: %s", e)
+
+def update_slack_message_on_ack(ticket_id: str, user_name: str, ack_time: Optional[datetime] = None,
+                                row: Optional[dict] = None):
+    """Rewrite the original Slack alert as CLOSED. Callers that already hold the ticket row pass it in."""
     if not SLACK_BOT_TOKEN: return
-    row = db_query("SELECT * FROM tickets WHERE id=:id", {"id": ticket_id}, one=True)
+    if row is None:
+        row = db_query("SELECT * FROM tickets WHERE id=:id", {"id": ticket_id}, one=True)
     if not (row and row.get("slack_ts") and row.get("slack_channel")):
         logger.warning("Cannot update Slack message: Missing slack_ts or channel for %s", ticket_id)
         return
     title = row.get("pipeline", "ADF Alert"); run_id = row.get("run_id", "N/A"); root = row.get("rca_result", "N/A")
     confidence = row.get("confidence", "Low"); error_type = row.get("error_type", "N/A"); itsm_ticket_id = row.get("itsm_ticket_id")
-    try: recs = json.loads(row.get("recommendations", "[]"))
+    try: recs = orjson.loads(row.get("recommendations") or "[]")
     except Exception: recs = []
     itsm_info = f"\n*ITSM Ticket:* `{itsm_ticket_id}`" if itsm_ticket_id else ""
-    ack_time = row.get("ack_ts") or datetime.utcnow().isoformat()
+    if ack_time is None:
+        ack_time = datetime.fromisoformat(row["ack_ts"]) if row.get("ack_ts") else datetime.now(timezone.utc)
     ack_by = user_name or row.get("ack_user", "System")
-    blocks = [
-        {"type":"header","text":{"type":"plain_text","text":f"{title} - CLOSED"}},
-        {"type":"section", "text": {"type":"mrkdwn", "text": f"*Ticket:* `{ticket_id}`{itsm_info}\n*Run ID:* `{run_id}`\n*Status:* `CLOSED`"}},
-        {"type":"context", "elements": [{"type": "mrkdwn", "text": f"Closed by *{ack_by}* on {datetime.fromisoformat(ack_time).strftime('%Y-%m-%d %H:%M:%S UTC')}"}]},
-        {"type":"divider"},
-        {"type":"section", "text": {"type":"mrkdwn", "text": f"*Root Cause:* {root}\n*Confidence:* {confidence}\n*Error Type:* `{error_type}`"}},
-    ]
-    if recs:
-        rec_text = "\n".join([f"* {r}" for r in recs])
-        blocks.append({"type":"section", "text": {"type":"mrkdwn", "text": f"*Resolution Steps:*\n{rec_text}"}})
-    dash_url = f"{PUBLIC_BASE_URL.rstrip('/')}/dashboard"
-    blocks.append({
-        "type":"actions",
-        "elements":[{"type":"button","text":{"type":"plain_text","text":"Open in Dashboard"},"url":dash_url, "style": "primary"}]
-    })
+    blocks = _build_slack_blocks(
+        header=f"{title} - CLOSED",
+        ticket_text=f"*Ticket:* `{ticket_id}`{itsm_info}\n*Run ID:* `{run_id}`\n*Status:* `CLOSED`",
+        root_text=f"*Root Cause:* {root}\n*Confidence:* {confidence}\n*Error Type:* `{error_type}`",
+        recs=recs,
+        context_text=f"Closed by *{ack_by}* on {ack_time.strftime('%Y-%m-%d %H:%M:%S UTC')}",
+    )
     payload = {
         "channel": row["slack_channel"], "ts": row["slack_ts"],
         "blocks": blocks, "text": f"Ticket {ticket_id}: {title} - CLOSED"
     }
-    headers = {"Authorization": f"Bearer {SLACK_BOT_TOKEN}", "Content-type": "application/json; charset=utf-8"}
     try:
-        r = requests.post("https://slack.com/api/chat.update", headers=headers, json=payload, timeout=10)
+        r = _breaker_call(slack_breaker, http_session.post, "https://slack.com/api/chat.update", headers=_SLACK_HEADERS, json=payload, timeout=(HTTP_CONNECT_TIMEOUT, 10))
         if r.status_code != 200:
             logger.warning("Slack update failed: %s %s", r.status_code, r.text)
         else:
             logger.info(f"Slack message updated for ticket {ticket_id}")
+    except BulkheadFullError as e:
+        logger.warning("Slack update gave up, bulkhead full: %s", e)
+        log_audit(ticket_id=ticket_id, action="Slack Notification Failed (bulkhead full)", details=str(e))
+    except CircuitBreakerError as e:
+        logger.warning("Slack update skipped: %s", e)
+        log_audit(ticket_id=ticket_id, action="Slack Notification Skipped (breaker open)", details=str(e))
     except Exception as e:
         logger.warning("Slack update post exception: %s", e)
 
-# --- Helper: resilient POST (for Logic App 502s) ---
-def _http_post_with_retries(url: str, payload: dict, timeout: int = 60, retries: int = 3, backoff: float = 1.5):
-    last = None
-    for attempt in range(1, retries+1):
+# --- Background Task: Jira ticket + Slack notification ---
+async def _create_jira_and_update(tid: str, pipeline: str, rca: dict, finops_tags: dict, run_id: str):
+    """Create the Jira ticket and post the Slack notification concurrently (runs after the webhook responds).
+    Slack posts without waiting for Jira; once both are done the message is updated with the Jira key."""
+    essentials_for_slack = {"alertRule": pipeline, "runId": run_id, "pipelineName": pipeline}
+
+    async def _do_jira():
+        itsm_ticket_id = None
         try:
-            r = requests.post(url, json=payload, timeout=timeout)
-            if r.status_code < 500:
-                return r
-            last = r
+            if ITSM_TOOL == "jira":
+                itsm_ticket_id = await asyncio.to_thread(create_jira_ticket, tid, pipeline, rca, finops_tags, run_id)
+                if itsm_ticket_id:
+                    db_execute("UPDATE tickets SET itsm_ticket_id = :itsm_id WHERE id = :tid",
+                               {"itsm_id": itsm_ticket_id, "tid": tid})
+                    log_audit(ticket_id=tid, action="Jira Ticket Created", details=f"Jira ID: {itsm_ticket_id}",
+                             itsm_ticket_id=itsm_ticket_id)
+                else:
+                    log_audit(ticket_id=tid, action="Jira Ticket Failed",
+                              details="Jira settings incomplete or API returned null.")
         except Exception as e:
-            last = e
-        time.sleep(backoff * attempt)
-    if isinstance(last, requests.Response):
-        return last
-    raise last if last else RuntimeError("HTTP post failed with unknown error")
+            logger.error(f"Jira ticket creation thread task failed: {e}")
+            log_audit(ticket_id=tid, action="Jira Ticket Failed", details=str(e))
+        return itsm_ticket_id
+
+    async def _do_slack():
+        try:
+            slack_result = await asyncio.to_thread(post_slack_notification, tid, essentials_for_slack, rca)
+            if slack_result:
+                log_audit(ticket_id=tid, action="Slack Notification Sent", pipeline=pipeline, run_id=run_id,
+                          details=f"Notification sent to channel: {SLACK_ALERT_CHANNEL}")
+            return slack_result
+        except Exception as e:
+            logger.debug("Slack notify failure: %s", e)
+            log_audit(ticket_id=tid, action="Slack Notification Failed", pipeline=pipeline, run_id=run_id,
+                      details=f"Error: {str(e)}")
+            return None
+
+    itsm_ticket_id, slack_result = await asyncio.gather(_do_jira(), _do_slack())
+    if itsm_ticket_id and slack_result:
+        await asyncio.to_thread(update_slack_alert_itsm, tid, slack_result, essentials_for_slack, rca, itsm_ticket_id)
+
+# --- Ticket insert coalescer (Databricks ingest bursts) ---
+# Group commit: a ticket that arrives while no insert is running is committed straight away;
+# tickets that arrive while one is in flight queue up and share the next INSERT transaction and
+# WebSocket broadcast (up to INGEST_BATCH_MAX). Batching therefore only happens under load.
+# Each request still awaits its own row's commit, so duplicate run_ids and DB errors are
+# reported per request exactly as before.
+INGEST_BATCH_MAX = int(os.getenv("INGEST_BATCH_MAX", "64"))
+_TICKET_INSERT_SQL = """
+    INSERT INTO tickets (id, timestamp, pipeline, run_id, rca_result, recommendations, confidence, severity, priority,
+                         error_type, affected_entity, status, sla_seconds, sla_status,
+                         finops_team, finops_owner, finops_cost_center, blob_log_url, itsm_ticket_id,
+                         logic_app_run_id, processing_mode)
+    VALUES (:id, :timestamp, :pipeline, :run_id, :rca_result, :recommendations, :confidence, :severity, :priority,
+            :error_type, :affected_entity, :status, :sla_seconds, :sla_status,
+            :finops_team, :finops_owner, :finops_cost_center, :blob_log_url, :itsm_ticket_id,
+            :logic_app_run_id, :processing_mode)
+"""
+
+def _insert_ticket_rows(rows: List[dict]) -> List[Optional[Exception]]:
+    """Insert all rows in one transaction. If that fails, retry row by row so a bad row
+    (e.g. duplicate run_id) only fails itself. Returns one error-or-None per row."""
+    try:
+        with engine.begin() as conn:
+            conn.execute(text(_TICKET_INSERT_SQL), rows)
+        return [None] * len(rows)
+    except Exception as e:
+        if len(rows) == 1:
+            return [e]
+    results = []
+    for row in rows:
+        try:
+            db_execute(_TICKET_INSERT_SQL, row)
+            results.append(None)
+        except Exception as e:
+            results.append(e)
+    return results
+
+class TicketInsertBatcher:
+    def __init__(self, max_batch: int):
+        self.max_batch = max_batch
+        self._pending: List[tuple] = []
+        self._flusher: Optional[asyncio.Task] = None
+
+    async def insert(self, row: dict):
+        """Queue a ticket row and wait until its batch is committed (raises that row's DB error)."""
+        fut = asyncio.get_running_loop().create_future()
+        self._pending.append((row, fut))
+        if self._flusher is None:
+            self._flusher = asyncio.create_task(self._drain())
+        await fut
+
+    async def _drain(self):
+        try:
+            while self._pending:
+                batch, self._pending = self._pending[:self.max_batch], self._pending[self.max_batch:]
+                await self._commit(batch)
+        finally:
+            self._flusher = None
+
+    async def _commit(self, batch: List[tuple]):
+        try:
+            results = await asyncio.to_thread(_insert_ticket_rows, [row for row, _ in batch])
+        except Exception as e:
+            results = [e] * len(batch)
+        inserted = []
+        for (row, fut), err in zip(batch, results):
+            if err is None:
+                _remember_run_id(row.get("run_id"))
+                inserted.append(row["id"])
+            if fut.done():
+                continue
+            if err is None:
+                fut.set_result(None)
+            else:
+                fut.set_exception(err)
+        if inserted:
+            logger.info(f"Inserted {len(inserted)} ticket(s) in one batch")
+            invalidate_dashboard_cache()
+            try:
+                await manager.broadcast({"event": "new_tickets", "ticket_ids": inserted})
+            except Exception as e:
+                logger.debug("Broadcast failed: %s", e)
+
+_ticket_batcher = TicketInsertBatcher(INGEST_BATCH_MAX)
 
 # --- SIMPLIFIED: Ticket State Function ---
 async def perform_close_from_jira(ticket_id: str, row: dict, user_name: str, user_empid: str, details: str):
@@ -750,7 +1217,8 @@ async def perform_close_from_jira(ticket_id: str, row: dict, user_name: str, use
         return
 
     logger.info(f"PERFORM_CLOSE (from Jira): Closing {ticket_id} for user {user_name}...")
-    now = datetime.utcnow().replace(tzinfo=timezone.utc)
+    now = datetime.now(timezone.utc)
+    now_iso = now.isoformat()
     start_ts = datetime.fromisoformat(row["timestamp"]) if row.get("timestamp") else now
     diff = int((now - start_ts).total_seconds())
     mttr_minutes = round(diff / 60, 2)
@@ -759,18 +1227,20 @@ async def perform_close_from_jira(ticket_id: str, row: dict, user_name: str, use
     
     db_execute("""
       UPDATE tickets SET status='acknowledged', ack_user=:u, ack_empid=:e, ack_ts=:t, ack_seconds=:d, sla_status=:s WHERE id=:id
-    """, dict(u=user_name, e=user_empid, t=now.isoformat(), d=diff, s=sla_status, id=ticket_id))
+    """, dict(u=user_name, e=user_empid, t=now_iso, d=diff, s=sla_status, id=ticket_id))
     
     log_audit(
         ticket_id=ticket_id, action="Ticket Closed", pipeline=row.get("pipeline"), run_id=row.get("run_id"),
         user_name=user_name, user_empid=user_empid, time_taken_seconds=diff, mttr_minutes=mttr_minutes,
-        sla_status=sla_status, rca_summary=row.get("rca_result")[:200] if row.get("rca_result") else "", 
+        sla_status=sla_status, rca_summary=_trunc(row, "rca_result"), 
         finops_team=row.get("finops_team"),
-        finops_owner=row.get("finops_owner"), details=details, itsm_ticket_id=row.get("itsm_ticket_id")
+        finops_owner=row.get("finops_owner"), details=details, itsm_ticket_id=row.get("itsm_ticket_id"),
+        timestamp=now_iso, critical=True
     )
+    invalidate_dashboard_cache()
     try: await manager.broadcast({"event":"status_update","ticket_id":ticket_id,"new_status":"acknowledged", "user": user_name})
     except Exception: pass
-    try: update_slack_message_on_ack(ticket_id, user_name)
+    try: await asyncio.to_thread(update_slack_message_on_ack, ticket_id, user_name, ack_time=now, row=row)
     except Exception as e: logger.debug(f"Ack Slack update failed for {ticket_id}: {e}")
 
 # --- Authentication Endpoints ---
@@ -854,6 +1324,9 @@ async def check_ticket_exists(run_id: str, x_api_key: Optional[str] = Header(Non
     run_id = run_id.strip()
     if not run_id or run_id == "N/A":
         return {"exists": False, "ticket_id": None}
+
+    if not _run_id_may_exist(run_id):
+        return {"exists": False, "ticket_id": None}
     
     existing = db_query("SELECT id, timestamp, status FROM tickets WHERE run_id = :run_id", 
                         {"run_id": run_id}, one=True)
@@ -872,7 +1345,7 @@ async def check_ticket_exists(run_id: str, x_api_key: Optional[str] = Header(Non
 
 # --- Azure Monitor Endpoint (NO AUTH - Azure Action Groups don't support headers) ---
 @app.post("/azure-monitor")
-async def azure_monitor(request: Request):
+async def azure_monitor(request: Request, background: BackgroundTasks):
     """
     Receive alerts directly from Azure Monitor Action Groups
 
@@ -884,19 +1357,17 @@ async def azure_monitor(request: Request):
     4. Azure subscription access controls
     """
 
-    logger.info("=" * 80)
     logger.info("AZURE MONITOR WEBHOOK RECEIVED (Direct - No Auth)")
-    logger.info("=" * 80)
 
     try:
-        body = await request.json()
+        body = orjson.loads(await request.body())
     except Exception as e:
         logger.error("Invalid JSON body: %s", e)
         raise HTTPException(status_code=400, detail="Invalid JSON payload")
 
-    # Log raw payload preview for debugging
-    logger.info("Raw payload preview (first 500 chars):")
-    logger.info(json.dumps(body, indent=2)[:500])
+    # Log raw payload preview for debugging (serialized only when DEBUG is enabled)
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Raw payload preview (first 500 chars): %s", orjson.dumps(body).decode()[:500])
 
     # Use error extractor to parse webhook
     from error_extractors import AzureDataFactoryExtractor
@@ -933,7 +1404,7 @@ async def azure_monitor(request: Request):
     logger.info("ADF Error being sent to Gemini:\n%s", desc[:500])
 
     # ** DEDUPLICATION CHECK**
-    if runid:
+    if runid and _run_id_may_exist(runid):
         existing = db_query("SELECT id, status FROM tickets WHERE run_id = :run_id",
                            {"run_id": runid}, one=True)
         if existing:
@@ -945,7 +1416,7 @@ async def azure_monitor(request: Request):
                 run_id=runid,
                 details=f"Azure Monitor webhook attempted to create duplicate ticket for run_id {runid}. Original ticket: {existing['id']}"
             )
-            return JSONResponse({
+            return ORJSONResponse({
                 "status": "duplicate_ignored",
                 "ticket_id": existing["id"],
                 "message": f"Ticket already exists for run_id {runid}",
@@ -953,27 +1424,22 @@ async def azure_monitor(request: Request):
             })
 
     finops_tags = extract_finops_tags(pipeline)
-    rca = generate_rca_and_recs(desc)
+    now = datetime.now(timezone.utc)
+    ts = now.isoformat()
+    tid = f"ADF-{now.strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:6]}"
+
+    blob_url, rca = await _upload_blob_and_generate_rca(tid, body, desc)
     severity = rca.get("severity", "Medium")
     priority = rca.get("priority", derive_priority(severity))
     sla_seconds = sla_for_priority(priority)
-    tid = f"ADF-{datetime.utcnow().strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:6]}"
-    ts = datetime.utcnow().replace(tzinfo=timezone.utc).isoformat()
-
-    blob_url = None
-    if AZURE_BLOB_ENABLED:
-        try:
-            blob_url = await asyncio.to_thread(upload_payload_to_blob, tid, body)
-        except Exception as e:
-            logger.error("Blob upload thread task failed: %s", e)
 
     affected_entity_value = rca.get("affected_entity")
     if isinstance(affected_entity_value, dict):
-        affected_entity_value = json.dumps(affected_entity_value)
+        affected_entity_value = orjson.dumps(affected_entity_value).decode()
     
     ticket_data = dict(
         id=tid, timestamp=ts, pipeline=pipeline, run_id=runid,
-        rca_result=rca.get("root_cause"), recommendations=json.dumps(rca.get("recommendations") or []),
+        rca_result=rca.get("root_cause"), recommendations=orjson.dumps(rca.get("recommendations") or []).decode(),
         confidence=rca.get("confidence"), severity=severity, priority=priority,
         error_type=rca.get("error_type"), affected_entity=affected_entity_value,
         status="open", sla_seconds=sla_seconds, sla_status="Pending",
@@ -994,13 +1460,14 @@ async def azure_monitor(request: Request):
                 :finops_team, :finops_owner, :finops_cost_center, :blob_log_url, :itsm_ticket_id,
                 :logic_app_run_id, :processing_mode)
         """, ticket_data)
+        _remember_run_id(runid)
         logger.info("RCA stored in DB for %s (run_id: %s)", tid, runid)
     except Exception as e:
         logger.error(f"Failed to insert ticket: {e}")
         # If unique constraint violation, it's a race condition duplicate
         if "UNIQUE constraint failed" in str(e) or "duplicate key" in str(e).lower():
             existing = db_query("SELECT id FROM tickets WHERE run_id = :run_id", {"run_id": runid}, one=True)
-            return JSONResponse({
+            return ORJSONResponse({
                 "status": "duplicate_race_condition",
                 "ticket_id": existing["id"] if existing else "unknown",
                 "message": f"Race condition: Ticket for run_id {runid} was created by another request"
@@ -1008,48 +1475,19 @@ async def azure_monitor(request: Request):
         raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
 
     log_audit(ticket_id=tid, action="Ticket Created", pipeline=pipeline, run_id=runid,
-              rca_summary=rca.get("root_cause")[:200] if rca.get("root_cause") else "", sla_status="Pending",
+              rca_summary=_trunc(rca, "root_cause"), sla_status="Pending",
               finops_team=finops_tags["team"], finops_owner=finops_tags["owner"],
-              details=f"Severity: {severity}, Priority: {priority}, Source: Azure Monitor Direct Webhook")
+              details=f"Severity: {severity}, Priority: {priority}, Source: Azure Monitor Direct Webhook, "
+                      f"Processing Mode: {processing_mode}, LogicAppRun: {logic_app_run_id}")
 
-    log_audit(ticket_id=tid, action="Azure Monitor Webhook Received", pipeline=pipeline, run_id=runid,
-              details=f"Alert received directly from Azure Monitor Action Group (no Logic App)")
-    
-    itsm_ticket_id = None
-    logger.info(f"ITSM_TOOL setting is: '{ITSM_TOOL}'")
-    if ITSM_TOOL == "jira":
-        try:
-            itsm_ticket_id = await asyncio.to_thread(create_jira_ticket, tid, pipeline, rca, finops_tags, runid)
-            if itsm_ticket_id:
-                db_execute("UPDATE tickets SET itsm_ticket_id = :itsm_id WHERE id = :tid",
-                           {"itsm_id": itsm_ticket_id, "tid": tid})
-                log_audit(ticket_id=tid, action="Jira Ticket Created", details=f"Jira ID: {itsm_ticket_id}",
-                         itsm_ticket_id=itsm_ticket_id)
-                ticket_data["itsm_ticket_id"] = itsm_ticket_id
-            else:
-                log_audit(ticket_id=tid, action="Jira Ticket Failed",
-                          details="Jira settings incomplete or API returned null.")
-        except Exception as e:
-            logger.error(f"Jira ticket creation thread task failed: {e}")
-            log_audit(ticket_id=tid, action="Jira Ticket Failed", details=str(e))
+    # Jira + Slack run after the response is sent
+    background.add_task(_create_jira_and_update, tid, pipeline, rca, finops_tags, runid)
 
+    invalidate_dashboard_cache()
     try:
         await manager.broadcast({"event": "new_ticket", "ticket_id": tid})
     except Exception as e:
         logger.debug("Broadcast failed: %s", e)
-    
-    try:
-        # Create essentials dict for Slack notification
-        essentials_for_slack = {"alertRule": pipeline, "runId": runid, "pipelineName": pipeline}
-        slack_result = post_slack_notification(tid, essentials_for_slack, rca, itsm_ticket_id)
-        if slack_result:
-            log_audit(ticket_id=tid, action="Slack Notification Sent", pipeline=pipeline, run_id=runid,
-                      details=f"Notification sent to channel: {SLACK_ALERT_CHANNEL}",
-                      itsm_ticket_id=itsm_ticket_id)
-    except Exception as e:
-        logger.debug("Slack notify failure: %s", e)
-        log_audit(ticket_id=tid, action="Slack Notification Failed", pipeline=pipeline, run_id=runid,
-                  details=f"Error: {str(e)}")
 
     # Auto-Remediation (if enabled)
     if AUTO_REMEDIATION_ENABLED and rca.get("auto_heal_possible"):
@@ -1059,88 +1497,52 @@ async def azure_monitor(request: Request):
 
     logger.info(f"✅ Successfully created ticket {tid} for ADF alert")
 
-    return JSONResponse({
-        "status": "success",
+    return ORJSONResponse({
+        "status": "queued",
         "ticket_id": tid,
         "run_id": runid,
         "pipeline": pipeline,
         "severity": severity,
         "priority": priority,
-        "itsm_ticket_id": itsm_ticket_id,
-        "message": "Ticket created successfully from Azure Monitor webhook"
+        "message": "Ticket created from Azure Monitor webhook; Jira/Slack notifications queued"
     })
 
 
 # --- Databricks Monitor Endpoint (API Key Auth) WITH DEDUPLICATION ---
 @app.post("/databricks-monitor")
-async def databricks_monitor(request: Request):
+async def databricks_monitor(request: Request, background: BackgroundTasks):
 
     try:
-        body = await request.json()
+        body = orjson.loads(await request.body())
     except Exception as e:
         logger.error("Invalid JSON body: %s", e)
         raise HTTPException(status_code=400, detail="Invalid JSON payload")
 
-    logger.info("=" * 80)
-    logger.info("DATABRICKS WEBHOOK RECEIVED - RAW PAYLOAD:")
-    logger.info(json.dumps(body, indent=2))
-    logger.info("=" * 80)
+    logger.info("DATABRICKS WEBHOOK RECEIVED")
+    logger.debug("Raw payload: %s", body)
 
-    event_type = body.get("event") or body.get("event_type")
+    event_type = first(body, "event", "event_type")
 
     if event_type:
         logger.info(f"Detected Databricks Event Delivery webhook, event_type: {event_type}")
         # Extract from nested 'job' and 'run' objects
-        job_obj = body.get("job", {})
-        run_obj = body.get("run", {})
-
-        job_name = (
-            job_obj.get("settings", {}).get("name") or
-            run_obj.get("run_name") or
-            body.get("job_name") or body.get("JobName") or
-            "Databricks Job/Cluster"
-        )
-
-        run_id = (
-            body.get("run_id") or body.get("RunId") or
-            run_obj.get("run_id") or
-            body.get("job_run_id") or body.get("JobRunId")
-        )
-
-        job_id = (
-            body.get("job_id") or body.get("JobId") or
-            job_obj.get("job_id") or
-            run_obj.get("job_id")
-        )
-
+        job_name = first(body, "job.settings.name", "run.run_name", "job_name", "JobName",
+                         default="Databricks Job/Cluster")
+        run_id = first(body, "run_id", "RunId", "run.run_id", "job_run_id", "JobRunId")
+        job_id = first(body, "job_id", "JobId", "job.job_id", "run.job_id")
         # Try to extract error from event webhook
-        error_message = (
-            run_obj.get("state", {}).get("state_message") or
-            run_obj.get("state_message") or
-            body.get("error_message") or body.get("ErrorMessage") or
-            f"Databricks job event: {event_type}"
-        )
+        error_message = first(body, "run.state.state_message", "run.state_message", "error_message", "ErrorMessage",
+                              default=f"Databricks job event: {event_type}")
     else:
         # Standard extraction for other webhook formats
-        job_name = (body.get("job_name") or body.get("JobName") or
-                    body.get("cluster_name") or body.get("ClusterName") or
-                    body.get("notebook_path") or body.get("NotebookPath") or
-                    "Databricks Job/Cluster")
-
-        run_id = (body.get("run_id") or body.get("RunId") or
-                  body.get("job_run_id") or body.get("JobRunId") or
-                  body.get("cluster_id") or body.get("ClusterId"))
-
-        # Extract error message
-        error_message = (body.get("error_message") or body.get("ErrorMessage") or
-                         body.get("exception_message") or body.get("ExceptionMessage") or
-                         body.get("error") or body.get("Error") or
-                         body.get("state_message") or body.get("StateMessage") or
-                         str(body))
-
-        job_id = body.get("job_id") or body.get("JobId") or "N/A"
-    cluster_id = body.get("cluster_id") or body.get("ClusterId") or "N/A"
-    workspace_url = body.get("workspace_url") or body.get("WorkspaceUrl") or body.get("workspace_id") or "N/A"
+        job_name = first(body, "job_name", "JobName", "cluster_name", "ClusterName", "notebook_path", "NotebookPath",
+                         default="Databricks Job/Cluster")
+        run_id = first(body, "run_id", "RunId", "job_run_id", "JobRunId", "cluster_id", "ClusterId")
+        error_message = first(body, "error_message", "ErrorMessage", "exception_message", "ExceptionMessage",
+                              "error", "Error", "state_message", "StateMessage") or str(body)
+        job_id = first(body, "job_id", "JobId", default="N/A")
+    cluster_id = first(body, "cluster_id", "ClusterId", default="N/A")
+    workspace_url = first(body, "workspace_url", "WorkspaceUrl", "workspace_id", default="N/A")
 
     logger.info(f"📋 Extracted from webhook: job_name={job_name}, run_id={run_id}, job_id={job_id}")
     logger.info(f"📝 Initial error_message from webhook: {error_message[:200]}...")
@@ -1152,7 +1554,8 @@ async def databricks_monitor(request: Request):
         api_fetch_attempted = True
         try:
             logger.info(f"🔄 Attempting to fetch detailed error from Databricks Jobs API for run_id: {run_id}")
-            dbx_details = fetch_databricks_run_details(run_id)
+            # Blocking HTTP (with retries) - keep it off the event loop
+            dbx_details = await asyncio.to_thread(fetch_databricks_run_details, run_id)
 
             if dbx_details:
                 api_fetch_success = True
@@ -1170,7 +1573,7 @@ async def databricks_monitor(request: Request):
                 # Update metadata from actual run
                 job_name = dbx_details.get("run_name") or job_name
                 job_id = dbx_details.get("job_id") or job_id
-                cluster_id = dbx_details.get("cluster_instance", {}).get("cluster_id") or cluster_id
+                cluster_id = first(dbx_details, "cluster_instance.cluster_id", default=cluster_id)
             else:
                 logger.error("❌ Databricks API fetch returned None - check if DATABRICKS_HOST and DATABRICKS_TOKEN are configured")
                 logger.error("❌ Falling back to webhook error_message (may be generic)")
@@ -1181,15 +1584,11 @@ async def databricks_monitor(request: Request):
     else:
         logger.warning(f"⚠️  No valid run_id found in webhook (run_id={run_id}), cannot fetch from API")
 
-    logger.info("=" * 80)
-    logger.info(f"📤 FINAL error_message being sent to RCA AI:")
-    logger.info(f"   API fetch attempted: {api_fetch_attempted}")
-    logger.info(f"   API fetch success: {api_fetch_success}")
-    logger.info(f"   Error message length: {len(error_message)} chars")
-    logger.info(f"   Error message preview:\n{error_message[:500]}")
-    logger.info("=" * 80)
+    logger.info("📤 FINAL error_message being sent to RCA AI (API fetch attempted: %s, success: %s, length: %d chars)",
+                api_fetch_attempted, api_fetch_success, len(error_message))
+    logger.debug("   Error message preview:\n%s", error_message[:500])
 
-    if run_id:
+    if run_id and _run_id_may_exist(run_id):
         existing = db_query("SELECT id, status FROM tickets WHERE run_id = :run_id",
                            {"run_id": run_id}, one=True)
         if existing:
@@ -1201,7 +1600,7 @@ async def databricks_monitor(request: Request):
                 run_id=run_id,
                 details=f"Databricks job attempted to create duplicate ticket for run_id {run_id}. Original ticket: {existing['id']}"
             )
-            return JSONResponse({
+            return ORJSONResponse({
                 "status": "duplicate_ignored",
                 "ticket_id": existing["id"],
                 "message": f"Ticket already exists for run_id {run_id}",
@@ -1211,33 +1610,26 @@ async def databricks_monitor(request: Request):
     # Extract FinOps tags from job/cluster name
     finops_tags = extract_finops_tags(job_name, resource_type="databricks")
 
-    # Generate RCA using AI (Databricks-specific)
-    rca = generate_rca_and_recs(error_message, source_type="databricks")
+    # Create unique ticket ID
+    now = datetime.now(timezone.utc)
+    ts = now.isoformat()
+    tid = f"DBX-{now.strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:6]}"
+
+    # Upload payload to Azure Blob (if enabled) while generating RCA using AI (Databricks-specific)
+    blob_url, rca = await _upload_blob_and_generate_rca(tid, body, error_message, source_type="databricks")
 
     severity = rca.get("severity", "Medium")
     priority = rca.get("priority", derive_priority(severity))
     sla_seconds = sla_for_priority(priority)
 
-    # Create unique ticket ID
-    tid = f"DBX-{datetime.utcnow().strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:6]}"
-    ts = datetime.utcnow().replace(tzinfo=timezone.utc).isoformat()
-
-    # Upload payload to Azure Blob if enabled
-    blob_url = None
-    if AZURE_BLOB_ENABLED:
-        try:
-            blob_url = await asyncio.to_thread(upload_payload_to_blob, tid, body)
-        except Exception as e:
-            logger.error("Blob upload thread task failed: %s", e)
-
     affected_entity_value = rca.get("affected_entity")
     if isinstance(affected_entity_value, dict):
-        affected_entity_value = json.dumps(affected_entity_value)
+        affected_entity_value = orjson.dumps(affected_entity_value).decode()
 
     # Store ticket in database
     ticket_data = dict(
         id=tid, timestamp=ts, pipeline=job_name, run_id=run_id,
-        rca_result=rca.get("root_cause"), recommendations=json.dumps(rca.get("recommendations") or []),
+        rca_result=rca.get("root_cause"), recommendations=orjson.dumps(rca.get("recommendations") or []).decode(),
         confidence=rca.get("confidence"), severity=severity, priority=priority,
         error_type=rca.get("error_type"), affected_entity=affected_entity_value,
         status="open", sla_seconds=sla_seconds, sla_status="Pending",
@@ -1248,22 +1640,14 @@ async def databricks_monitor(request: Request):
     )
 
     try:
-        db_execute("""
-        INSERT INTO tickets (id, timestamp, pipeline, run_id, rca_result, recommendations, confidence, severity, priority,
-                             error_type, affected_entity, status, sla_seconds, sla_status,
-                             finops_team, finops_owner, finops_cost_center, blob_log_url, itsm_ticket_id,
-                             logic_app_run_id, processing_mode)
-        VALUES (:id, :timestamp, :pipeline, :run_id, :rca_result, :recommendations, :confidence, :severity, :priority,
-                :error_type, :affected_entity, :status, :sla_seconds, :sla_status,
-                :finops_team, :finops_owner, :finops_cost_center, :blob_log_url, :itsm_ticket_id,
-                :logic_app_run_id, :processing_mode)
-        """, ticket_data)
+        # Coalesced with concurrent Databricks ingests; also remembers the run_id and broadcasts
+        await _ticket_batcher.insert(ticket_data)
         logger.info("Databricks RCA stored in DB for %s (run_id: %s)", tid, run_id)
     except Exception as e:
         logger.error(f"Failed to insert ticket: {e}")
         if "UNIQUE constraint failed" in str(e) or "duplicate key" in str(e).lower():
             existing = db_query("SELECT id FROM tickets WHERE run_id = :run_id", {"run_id": run_id}, one=True)
-            return JSONResponse({
+            return ORJSONResponse({
                 "status": "duplicate_race_condition",
                 "ticket_id": existing["id"] if existing else "unknown",
                 "message": f"Race condition: Ticket for run_id {run_id} was created by another request"
@@ -1272,58 +1656,23 @@ async def databricks_monitor(request: Request):
 
     # Log audit trail
     log_audit(ticket_id=tid, action="Ticket Created", pipeline=job_name, run_id=run_id,
-              rca_summary=rca.get("root_cause")[:200] if rca.get("root_cause") else "", sla_status="Pending",
+              rca_summary=_trunc(rca, "root_cause"), sla_status="Pending",
               finops_team=finops_tags["team"], finops_owner=finops_tags["owner"],
               details=f"Severity: {severity}, Priority: {priority}, Source: Databricks, JobID: {job_id}, ClusterID: {cluster_id}")
 
-    # Create Jira ticket if enabled
-    itsm_ticket_id = None
-    if ITSM_TOOL == "jira":
-        try:
-            itsm_ticket_id = await asyncio.to_thread(create_jira_ticket, tid, job_name, rca, finops_tags, run_id)
-            if itsm_ticket_id:
-                db_execute("UPDATE tickets SET itsm_ticket_id = :itsm_id WHERE id = :tid",
-                           {"itsm_id": itsm_ticket_id, "tid": tid})
-                log_audit(ticket_id=tid, action="Jira Ticket Created", details=f"Jira ID: {itsm_ticket_id}",
-                         itsm_ticket_id=itsm_ticket_id)
-                ticket_data["itsm_ticket_id"] = itsm_ticket_id
-            else:
-                log_audit(ticket_id=tid, action="Jira Ticket Failed",
-                          details="Jira settings incomplete or API returned null.")
-        except Exception as e:
-            logger.error(f"Jira ticket creation thread task failed: {e}")
-            log_audit(ticket_id=tid, action="Jira Ticket Failed", details=str(e))
-
-    # Broadcast to WebSocket clients
-    try:
-        await manager.broadcast({"event": "new_ticket", "ticket_id": tid})
-    except Exception as e:
-        logger.debug("Broadcast failed: %s", e)
-
-    # Send Slack notification
-    try:
-        essentials = {"alertRule": job_name, "runId": run_id, "pipelineName": job_name}
-        slack_result = post_slack_notification(tid, essentials, rca, itsm_ticket_id)
-        if slack_result:
-            log_audit(ticket_id=tid, action="Slack Notification Sent", pipeline=job_name, run_id=run_id,
-                      details=f"Notification sent to channel: {SLACK_ALERT_CHANNEL}",
-                      itsm_ticket_id=itsm_ticket_id)
-    except Exception as e:
-        logger.debug("Slack notify failure: %s", e)
-        log_audit(ticket_id=tid, action="Slack Notification Failed", pipeline=job_name, run_id=run_id,
-                  details=f"Error: {str(e)}")
+    # Jira + Slack run after the response is sent
+    background.add_task(_create_jira_and_update, tid, job_name, rca, finops_tags, run_id)
 
     logger.info(f"✅ Successfully created ticket {tid} for Databricks alert")
 
-    return JSONResponse({
-        "status": "success",
+    return ORJSONResponse({
+        "status": "queued",
         "ticket_id": tid,
         "run_id": run_id,
         "job_name": job_name,
         "severity": severity,
         "priority": priority,
-        "itsm_ticket_id": itsm_ticket_id,
-        "message": "Ticket created successfully from Databricks webhook"
+        "message": "Ticket created from Databricks webhook; Jira/Slack notifications queued"
     })
 
 
@@ -1346,19 +1695,17 @@ async def azure_monitor_alert(request: Request):
     4. Azure subscription access controls
     """
 
-    logger.info("=" * 80)
     logger.info("AZURE MONITOR ALERT WEBHOOK RECEIVED (Databricks Cluster Failure)")
-    logger.info("=" * 80)
 
     try:
-        body = await request.json()
+        body = orjson.loads(await request.body())
     except Exception as e:
         logger.error("Invalid JSON body: %s", e)
         raise HTTPException(status_code=400, detail="Invalid JSON payload")
 
-    # Log raw payload preview for debugging
-    logger.info("Raw payload preview (first 500 chars):")
-    logger.info(json.dumps(body, indent=2)[:500])
+    # Log raw payload preview for debugging (serialized only when DEBUG is enabled)
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Raw payload preview (first 500 chars): %s", orjson.dumps(body).decode()[:500])
 
     try:
         # Extract data from Azure Monitor Common Alert Schema
@@ -1389,7 +1736,7 @@ async def azure_monitor_alert(request: Request):
 
         if not rows or len(rows) == 0:
             logger.warning("Alert fired but no rows in SearchResults - likely resolved alert")
-            return JSONResponse({
+            return ORJSONResponse({
                 "status": "ignored",
                 "message": "No cluster failures in SearchResults"
             })
@@ -1430,7 +1777,7 @@ async def azure_monitor_alert(request: Request):
 
             # ** DEDUPLICATION CHECK **
             existing = db_query("SELECT id, status FROM tickets WHERE run_id = :run_id",
-                               {"run_id": run_id}, one=True)
+                               {"run_id": run_id}, one=True) if _run_id_may_exist(run_id) else None
             if existing:
                 logger.warning(f"DUPLICATE DETECTED: run_id {run_id} already has ticket {existing['id']}")
                 log_audit(
@@ -1470,33 +1817,26 @@ This cluster was terminated with code '{termination_code}' which indicates a fai
             # Extract FinOps tags from cluster name
             finops_tags = extract_finops_tags(cluster_name, resource_type="databricks")
 
-            # Generate RCA using AI (Databricks-specific)
-            rca = generate_rca_and_recs(error_description, source_type="databricks")
+            # Create unique ticket ID
+            now = datetime.now(timezone.utc)
+            ts = now.isoformat()
+            tid = f"DBX-ALERT-{now.strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:6]}"
+
+            # Upload payload to Azure Blob (if enabled) while generating RCA using AI (Databricks-specific)
+            blob_url, rca = await _upload_blob_and_generate_rca(tid, body, error_description, source_type="databricks")
 
             severity = rca.get("severity", "Medium")
             priority = rca.get("priority", derive_priority(severity))
             sla_seconds = sla_for_priority(priority)
 
-            # Create unique ticket ID
-            tid = f"DBX-ALERT-{datetime.utcnow().strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:6]}"
-            ts = datetime.utcnow().replace(tzinfo=timezone.utc).isoformat()
-
-            # Upload payload to Azure Blob if enabled
-            blob_url = None
-            if AZURE_BLOB_ENABLED:
-                try:
-                    blob_url = await asyncio.to_thread(upload_payload_to_blob, tid, body)
-                except Exception as e:
-                    logger.error("Blob upload thread task failed: %s", e)
-
             affected_entity_value = rca.get("affected_entity")
             if isinstance(affected_entity_value, dict):
-                affected_entity_value = json.dumps(affected_entity_value)
+                affected_entity_value = orjson.dumps(affected_entity_value).decode()
 
             # Store ticket in database
             ticket_data = dict(
                 id=tid, timestamp=ts, pipeline=cluster_name, run_id=run_id,
-                rca_result=rca.get("root_cause"), recommendations=json.dumps(rca.get("recommendations") or []),
+                rca_result=rca.get("root_cause"), recommendations=orjson.dumps(rca.get("recommendations") or []).decode(),
                 confidence=rca.get("confidence"), severity=severity, priority=priority,
                 error_type=rca.get("error_type"), affected_entity=affected_entity_value,
                 status="open", sla_seconds=sla_seconds, sla_status="Pending",
@@ -1517,6 +1857,7 @@ This cluster was terminated with code '{termination_code}' which indicates a fai
                         :finops_team, :finops_owner, :finops_cost_center, :blob_log_url, :itsm_ticket_id,
                         :logic_app_run_id, :processing_mode)
                 """, ticket_data)
+                _remember_run_id(run_id)
                 logger.info("Databricks Alert RCA stored in DB for %s (run_id: %s)", tid, run_id)
             except Exception as e:
                 logger.error(f"Failed to insert ticket: {e}")
@@ -1533,12 +1874,10 @@ This cluster was terminated with code '{termination_code}' which indicates a fai
 
             # Log audit trail
             log_audit(ticket_id=tid, action="Ticket Created", pipeline=cluster_name, run_id=run_id,
-                      rca_summary=rca.get("root_cause")[:200] if rca.get("root_cause") else "", sla_status="Pending",
+                      rca_summary=_trunc(rca, "root_cause"), sla_status="Pending",
                       finops_team=finops_tags["team"], finops_owner=finops_tags["owner"],
-                      details=f"Severity: {severity}, Priority: {priority}, Source: Azure Monitor Alert, ClusterID: {cluster_id}, TerminationCode: {termination_code}")
-
-            log_audit(ticket_id=tid, action="Azure Monitor Alert Received", pipeline=cluster_name, run_id=run_id,
-                      details=f"Alert received from Azure Monitor (Alert Rule: {alert_rule}, Alert ID: {alert_id})")
+                      details=f"Severity: {severity}, Priority: {priority}, Source: Azure Monitor Alert, ClusterID: {cluster_id}, "
+                              f"TerminationCode: {termination_code}, Alert Rule: {alert_rule}, Alert ID: {alert_id}")
 
             # Create Jira ticket if enabled
             itsm_ticket_id = None
@@ -1559,6 +1898,7 @@ This cluster was terminated with code '{termination_code}' which indicates a fai
                     log_audit(ticket_id=tid, action="Jira Ticket Failed", details=str(e))
 
             # Broadcast to WebSocket clients
+            invalidate_dashboard_cache()
             try:
                 await manager.broadcast({"event": "new_ticket", "ticket_id": tid})
             except Exception as e:
@@ -1567,7 +1907,7 @@ This cluster was terminated with code '{termination_code}' which indicates a fai
             # Send Slack notification
             try:
                 essentials_for_slack = {"alertRule": cluster_name, "runId": run_id, "pipelineName": cluster_name}
-                slack_result = post_slack_notification(tid, essentials_for_slack, rca, itsm_ticket_id)
+                slack_result = await asyncio.to_thread(post_slack_notification, tid, essentials_for_slack, rca, itsm_ticket_id)
                 if slack_result:
                     log_audit(ticket_id=tid, action="Slack Notification Sent", pipeline=cluster_name, run_id=run_id,
                               details=f"Notification sent to channel: {SLACK_ALERT_CHANNEL}",
@@ -1593,7 +1933,7 @@ This cluster was terminated with code '{termination_code}' which indicates a fai
         # Return summary of all created tickets
         logger.info(f"Processed {len(rows)} cluster failures, created {len([t for t in created_tickets if t['status'] == 'success'])} tickets")
 
-        return JSONResponse({
+        return ORJSONResponse({
             "status": "success",
             "alert_rule": alert_rule,
             "alert_id": alert_id,
@@ -1617,86 +1957,178 @@ def _get_ticket_columns():
             "sla_status, slack_ts, slack_channel, finops_team, finops_owner, finops_cost_center, itsm_ticket_id, "
             "logic_app_run_id, processing_mode")
 
+_TICKET_EXPORT_FIELDS = tuple(c.strip() for c in _get_ticket_columns().split(","))
+_AUDIT_EXPORT_FIELDS = ("id", "timestamp", "ticket_id", "pipeline", "run_id", "action", "user_name", "user_empid",
+                        "time_taken_seconds", "mttr_minutes", "sla_status", "rca_summary", "finops_team",
+                        "finops_owner", "details", "itsm_ticket_id")
+CSV_EXPORT_CHUNK_BYTES = 64 * 1024
+
+# List views only need the summary fields; recommendations are loaded by the detail view
+_LIST_COLUMNS = ", ".join(c for c in _TICKET_EXPORT_FIELDS if c != "recommendations")
+
+def _includes_recommendations(include: Optional[str]) -> bool:
+    """`?include=recommendations` switches a list endpoint to the full projection."""
+    return bool(include) and "recommendations" in include.split(",")
+
+# Ticket queries, prepared once at import. List/export statements are keyed by
+# (status, full projection); exports always use the full projection.
+_TICKET_LIST_SORT = {"open": "timestamp", "in_progress": "timestamp", "acknowledged": "ack_ts"}
+_SQL_TICKET_LIST = {
+    (status, full): text(f"SELECT {_get_ticket_columns() if full else _LIST_COLUMNS} FROM tickets "
+                         f"WHERE status = '{status}' ORDER BY {sort_col} DESC")
+    for status, sort_col in _TICKET_LIST_SORT.items() for full in (False, True)
+}
+
+# Full slim-projection lists rendered to a JSON array by Azure SQL itself (FOR JSON honours
+# ORDER BY), so the endpoint forwards the bytes without building per-row dicts. SQLite's
+# json_group_array does not guarantee input order, so SQLite serializes the ordered rows instead.
+_SQL_TICKET_LIST_JSON = {
+    status: text(f"SELECT {_LIST_COLUMNS} FROM tickets WHERE status = '{status}' "
+                 f"ORDER BY {sort_col} DESC FOR JSON PATH, INCLUDE_NULL_VALUES")
+    for status, sort_col in _TICKET_LIST_SORT.items()
+}
+
+# Keyset pagination for the list endpoints: pages are ordered by (sort column, id) DESC and the
+# cursor carries the last row's pair, so deep pages cost the same as the first one.
+# The sort column is nullable (e.g. ack_ts); NULL sorts lowest on both SQLite and Azure SQL, so
+# NULL-keyed rows come last and a NULL cursor key pages through them by id alone.
+_SQL_LIMIT = "LIMIT :limit" if IS_SQLITE else "OFFSET 0 ROWS FETCH NEXT :limit ROWS ONLY"
+
+@functools.lru_cache(maxsize=None)
+def _ticket_page_sql(status: str, full: bool, cursor_kind: Optional[str]) -> TextClause:
+    """cursor_kind: None (first page), "key" (cursor key set) or "null" (cursor key is NULL)."""
+    sort_col = _TICKET_LIST_SORT[status]
+    where = f"status = '{status}'"
+    if cursor_kind == "key":
+        where += (f" AND ({sort_col} < :cur_key OR ({sort_col} = :cur_key AND id < :cur_id)"
+                  f" OR {sort_col} IS NULL)")
+    elif cursor_kind == "null":
+        where += f" AND {sort_col} IS NULL AND id < :cur_id"
+    return text(f"SELECT {_get_ticket_columns() if full else _LIST_COLUMNS} FROM tickets "
+                f"WHERE {where} ORDER BY {sort_col} DESC, id DESC {_SQL_LIMIT}")
+
+def _encode_cursor(key, ticket_id) -> str:
+    return base64.urlsafe_b64encode(orjson.dumps([key, ticket_id])).decode()
+
+def _decode_cursor(cursor: str) -> tuple:
+    """(sort key or None, ticket id); anything that is not a cursor we issued is a 400."""
+    try:
+        value = orjson.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except Exception:
+        value = None
+    if not (isinstance(value, list) and len(value) == 2
+            and (value[0] is None or isinstance(value[0], str)) and isinstance(value[1], str)):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return value[0], value[1]
+
+def _list_tickets(status: str, include: Optional[str], limit: Optional[int], cursor: Optional[str]):
+    """Without `limit` the whole status list is returned (dashboard behaviour); with it, one keyset page."""
+    full = _includes_recommendations(include)
+    if not limit:
+        if not full:
+            if IS_SQLITE:
+                body = orjson.dumps(db_query(_SQL_TICKET_LIST[status, False]))
+            else:
+                body = db_query_json(_SQL_TICKET_LIST_JSON[status])
+            return Response(content=b'{"tickets":' + body + b'}', media_type="application/json")
+        return {"tickets": _hydrate_rows(db_query(_SQL_TICKET_LIST[status, full]))}
+    params = {"limit": limit}
+    cursor_kind = None
+    if cursor:
+        cur_key, params["cur_id"] = _decode_cursor(cursor)
+        cursor_kind = "null" if cur_key is None else "key"
+        if cur_key is not None:
+            params["cur_key"] = cur_key
+    rows = _hydrate_rows(db_query(_ticket_page_sql(status, full, cursor_kind), params))
+    next_cursor = None
+    if len(rows) == limit:
+        last = rows[-1]
+        next_cursor = _encode_cursor(last.get(_TICKET_LIST_SORT[status]), last["id"])
+    return {"tickets": rows, "next_cursor": next_cursor}
+_SQL_TICKET_BY_ID = text(f"SELECT {_get_ticket_columns()} FROM tickets WHERE id=:id")
+_SQL_TICKET_STATUS_BY_ITSM = text("SELECT id, status FROM tickets WHERE itsm_ticket_id = :key")
+_SQL_AUDIT_EXPORT = text(f"SELECT {', '.join(_AUDIT_EXPORT_FIELDS)} FROM audit_trail ORDER BY timestamp DESC")
+
+def _hydrate_rows(rows: List[dict]) -> List[dict]:
+    """Decode the stored `recommendations` JSON in place; non-JSON text is wrapped as a one-item list."""
+    for r in rows:
+        v = r.get("recommendations")
+        if not isinstance(v, str):
+            continue
+        if not v:
+            r["recommendations"] = []
+        elif v[0] in "[{":
+            try:
+                r["recommendations"] = orjson.loads(v)
+            except orjson.JSONDecodeError:
+                r["recommendations"] = [v]
+        else:
+            r["recommendations"] = [v]
+    return rows
+
 @app.get("/api/tickets/{ticket_id}")
 async def get_ticket_details(ticket_id: str, current_user: dict = Depends(get_current_user)):
-    columns = _get_ticket_columns()
-    row = db_query(f"SELECT {columns} FROM tickets WHERE id=:id", {"id": ticket_id}, one=True)
+    row = db_query(_SQL_TICKET_BY_ID, {"id": ticket_id}, one=True)
     if not row:
         raise HTTPException(status_code=404, detail="Ticket not found")
-    if isinstance(row.get("recommendations"), str):
-        try:
-            row["recommendations"] = json.loads(row["recommendations"]) if row.get("recommendations") else []
-        except Exception:
-            row["recommendations"] = [row["recommendations"]]
+    _hydrate_rows([row])
     return {"ticket": row}
 
 @app.get("/api/open-tickets")
-async def api_open_tickets(current_user: dict = Depends(get_current_user)):
-    columns = _get_ticket_columns()
-    rows = db_query(f"SELECT {columns} FROM tickets WHERE status = 'open' ORDER BY timestamp DESC")
-    for r in rows:
-        if isinstance(r.get("recommendations"), str):
-            try:
-                r["recommendations"] = json.loads(r["recommendations"]) if r.get("recommendations") else []
-            except Exception:
-                r["recommendations"] = [r["recommendations"]]
-    return {"tickets": rows}
+async def api_open_tickets(include: Optional[str] = Query(None), limit: Optional[int] = Query(None, ge=1, le=1000),
+                           cursor: Optional[str] = Query(None), current_user: dict = Depends(get_current_user)):
+    return _list_tickets("open", include, limit, cursor)
 
 @app.get("/api/in-progress-tickets")
-async def api_in_progress_tickets(current_user: dict = Depends(get_current_user)):
-    columns = _get_ticket_columns()
-    rows = db_query(f"SELECT {columns} FROM tickets WHERE status = 'in_progress' ORDER BY timestamp DESC")
-    for r in rows:
-        if isinstance(r.get("recommendations"), str):
-            try:
-                r["recommendations"] = json.loads(r["recommendations"]) if r.get("recommendations") else []
-            except Exception:
-                r["recommendations"] = [r["recommendations"]]
-    return {"tickets": rows}
+async def api_in_progress_tickets(include: Optional[str] = Query(None), limit: Optional[int] = Query(None, ge=1, le=1000),
+                                  cursor: Optional[str] = Query(None), current_user: dict = Depends(get_current_user)):
+    return _list_tickets("in_progress", include, limit, cursor)
 
 @app.get("/api/closed-tickets")
-async def api_closed_tickets(current_user: dict = Depends(get_current_user)):
-    columns = _get_ticket_columns()
-    rows = db_query(f"SELECT {columns} FROM tickets WHERE status = 'acknowledged' ORDER BY ack_ts DESC")
-    for r in rows:
-        if isinstance(r.get("recommendations"), str):
-            try:
-                r["recommendations"] = json.loads(r["recommendations"]) if r.get("recommendations") else []
-            except Exception:
-                r["recommendations"] = [r["recommendations"]]
-    return {"tickets": rows}
+async def api_closed_tickets(include: Optional[str] = Query(None), limit: Optional[int] = Query(None, ge=1, le=1000),
+                             cursor: Optional[str] = Query(None), current_user: dict = Depends(get_current_user)):
+    return _list_tickets("acknowledged", include, limit, cursor)
+
+# Dashboard counters in one aggregate query. Ack time falls back to ack_ts - timestamp when ack_seconds is unset.
+if IS_SQLITE:
+    _ACK_DIFF_SQL = "(julianday(ack_ts) - julianday(timestamp)) * 86400"
+else:
+    _ACK_DIFF_SQL = "DATEDIFF(second, TRY_CAST(timestamp AS datetimeoffset), TRY_CAST(ack_ts AS datetimeoffset))"
+_SUMMARY_SQL = f"""
+    SELECT COUNT(*) AS total,
+           SUM(CASE WHEN status <> 'acknowledged' OR status IS NULL THEN 1 ELSE 0 END) AS open_cnt,
+           SUM(CASE WHEN status = 'acknowledged' THEN 1 ELSE 0 END) AS ack_cnt,
+           SUM(CASE WHEN lower(sla_status) = 'breached' THEN 1 ELSE 0 END) AS breached,
+           AVG(CASE WHEN status = 'acknowledged'
+                    THEN CAST(COALESCE(NULLIF(ack_seconds, 0), {_ACK_DIFF_SQL}) AS FLOAT) END) AS avg_ack,
+           (SELECT COUNT(*) FROM audit_trail) AS total_audits
+      FROM tickets
+"""
 
-@app.get("/api/summary")
-async def api_summary(current_user: dict = Depends(get_current_user)):
-    tickets = db_query("SELECT * FROM tickets")
-    total = len(tickets)
-    open_tickets_list = [t for t in tickets if t.get("status") != "acknowledged"]
-    ack_tickets = [t for t in tickets if t.get("status") == "acknowledged"]
-    breached = [t for t in tickets if str(t.get("sla_status", "")).lower() == "breached"]
-    ack_times = []
-    for t in ack_tickets:
-        if t.get("ack_seconds"):
-            ack_times.append(t.get("ack_seconds"))
-        elif t.get("timestamp") and t.get("ack_ts"):
-            try:
-                start = datetime.fromisoformat(t["timestamp"])
-                end = datetime.fromisoformat(t["ack_ts"])
-                ack_times.append((end - start).total_seconds())
-            except Exception:
-                pass
-    avg_ack = round(sum(ack_times) / len(ack_times), 2) if ack_times else 0
-    
-    total_audits_result = db_query("SELECT COUNT(*) as count FROM audit_trail", one=True)
-    total_audits = total_audits_result.get("count", 0) if total_audits_result else 0
+def _summary_data() -> dict:
+    """Dashboard summary (cached). Blocking: call via asyncio.to_thread from async code."""
+    cached = _dashboard_cache_get("summary")
+    if cached is not None:
+        return cached
+    s = db_query(_SUMMARY_SQL, one=True) or {}
+    avg_ack = round(s.get("avg_ack") or 0, 2)
+    total_audits = s.get("total_audits") or 0
     
-    return {
-        "total_tickets": total, "open_tickets": len(open_tickets_list), 
-        "acknowledged_tickets": len(ack_tickets),
-        "sla_breached": len(breached), "avg_ack_time_sec": avg_ack,
+    return _dashboard_cache_set("summary", {
+        "total_tickets": s.get("total") or 0, "open_tickets": s.get("open_cnt") or 0, 
+        "acknowledged_tickets": s.get("ack_cnt") or 0,
+        "sla_breached": s.get("breached") or 0, "avg_ack_time_sec": avg_ack,
         "mttr_min": round(avg_ack / 60, 1) if avg_ack else 0,
         "total_audits": total_audits,
-        "timestamp": datetime.utcnow().isoformat() + "Z"
-    }
+        "timestamp": now_strings()[1]
+    })
+
+@app.get("/api/summary")
+async def api_summary(current_user: dict = Depends(get_current_user)):
+    cached = _dashboard_cache_get("summary")
+    if cached is not None:
+        return cached
+    return await asyncio.to_thread(_summary_data)
 
 @app.get("/dashboard", response_class=HTMLResponse)
 async def dashboard():
@@ -1725,124 +2157,135 @@ async def api_audit_trail(action: Optional[str] = Query(None), current_user: dic
 
 @app.get("/api/audit-summary")
 async def api_audit_summary(current_user: dict = Depends(get_current_user)):
+    cached = _dashboard_cache_get("audit_summary")
+    if cached is not None:
+        return cached
     try:
-        total_audits = db_query("SELECT COUNT(*) as count FROM audit_trail", one=True)
-        action_counts = db_query("""
-            SELECT action, COUNT(*) as count 
-            FROM audit_trail GROUP BY action ORDER BY count DESC
-        """)
-        recent_audits = db_query("SELECT * FROM audit_trail ORDER BY timestamp DESC LIMIT 10")
-        summary_data = await api_summary(current_user)
-        return {
-            "total_audits": total_audits.get("count", 0) if total_audits else 0,
+        # Independent queries run concurrently; the audit total comes from the summary aggregate
+        action_counts, recent_audits, summary_data = await asyncio.gather(
+            asyncio.to_thread(db_query, """
+                SELECT action, COUNT(*) as count 
+                FROM audit_trail GROUP BY action ORDER BY count DESC
+            """),
+            asyncio.to_thread(db_query, "SELECT * FROM audit_trail ORDER BY timestamp DESC LIMIT 10"),
+            asyncio.to_thread(_summary_data),
+        )
+        return _dashboard_cache_set("audit_summary", {
+            "total_audits": summary_data.get("total_audits", 0),
             "action_breakdown": action_counts, 
             "recent_audits": recent_audits,
             "open_tickets": summary_data.get("open_tickets", 0),
             "acknowledged_tickets": summary_data.get("acknowledged_tickets", 0),
             "mttr_min": summary_data.get("mttr_min", 0),
             "sla_breached": summary_data.get("sla_breached", 0)
-        }
+        })
     except Exception as e:
         logger.error(f"Failed to fetch audit summary: {e}")
         return {"total_audits": 0, "action_breakdown": [], "recent_audits": []}
 
+_CONFIG_RESPONSE = { "itsm_tool": ITSM_TOOL, "jira_domain": JIRA_DOMAIN }
+
 @app.get("/api/config")
 async def api_config():
-    return { "itsm_tool": ITSM_TOOL, "jira_domain": JIRA_DOMAIN }
+    # Env-derived and fixed for the process lifetime
+    return _CONFIG_RESPONSE
 
 # --- Export/Download Endpoints ---
+def _stream_csv(q: TextClause, fieldnames: tuple):
+    """Generate CSV text for a query in ~CSV_EXPORT_CHUNK_BYTES chunks, never holding the full result set."""
+    buf = StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(fieldnames)
+    # Rows come back in SELECT order, matching `fieldnames`, so write them positionally
+    for row in db_stream(q, as_dict=False):
+        writer.writerow(row)
+        if buf.tell() >= CSV_EXPORT_CHUNK_BYTES:
+            yield buf.getvalue()
+            buf.seek(0)
+            buf.truncate()
+    yield buf.getvalue()
+
+def _gzip_stream(chunks):
+    """Incrementally gzip a stream of text chunks."""
+    comp = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        data = comp.compress(chunk.encode("utf-8"))
+        if data:
+            yield data
+    yield comp.flush()
+
+def _accepts_gzip(accept_encoding: Optional[str]) -> bool:
+    """True if the Accept-Encoding header allows gzip with a non-zero q. An explicit gzip entry
+    takes precedence over '*'; q=0 is a refusal."""
+    qvalues = {}
+    for part in (accept_encoding or "").split(","):
+        coding, *params = part.split(";")
+        coding = coding.strip().lower()
+        if coding not in ("gzip", "*"):
+            continue
+        q = 1.0
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    pass
+        qvalues[coding] = q
+    q = qvalues.get("gzip", qvalues.get("*", 0.0))
+    return q > 0
+
+def _csv_export_response(q: TextClause, fieldnames: tuple, name: str,
+                         accept_encoding: Optional[str] = None) -> StreamingResponse:
+    # Sync generator: Starlette iterates it in a worker thread, so DB fetches don't block the event loop
+    body = _stream_csv(q, fieldnames)
+    headers = {"Content-Disposition": f"attachment; filename={name}_{now_strings()[0]}.csv",
+               "Vary": "Accept-Encoding"}
+    if _accepts_gzip(accept_encoding):
+        body = _gzip_stream(body)
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(body, media_type="text/csv", headers=headers)
+
 @app.get("/api/export/open-tickets")
-async def export_open_tickets(current_user: dict = Depends(get_current_user)):
-    columns = _get_ticket_columns()
-    rows = db_query(f"SELECT {columns} FROM tickets WHERE status = 'open' ORDER BY timestamp DESC")
-
-    output = StringIO()
-    if rows:
-        fieldnames = list(rows[0].keys())
-        writer = csv.DictWriter(output, fieldnames=fieldnames)
-        writer.writeheader()
-        writer.writerows(rows)
-
-    output.seek(0)
-    return StreamingResponse(
-        iter([output.getvalue()]),
-        media_type="text/csv",
-        headers={"Content-Disposition": f"attachment; filename=open_tickets_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}.csv"}
-    )
+async def export_open_tickets(accept_encoding: Optional[str] = Header(None), current_user: dict = Depends(get_current_user)):
+    return _csv_export_response(_SQL_TICKET_LIST["open", True], _TICKET_EXPORT_FIELDS, "open_tickets", accept_encoding)
 
 @app.get("/api/export/in-progress-tickets")
-async def export_in_progress_tickets(current_user: dict = Depends(get_current_user)):
-    columns = _get_ticket_columns()
-    rows = db_query(f"SELECT {columns} FROM tickets WHERE status = 'in_progress' ORDER BY timestamp DESC")
-
-    output = StringIO()
-    if rows:
-        fieldnames = list(rows[0].keys())
-        writer = csv.DictWriter(output, fieldnames=fieldnames)
-        writer.writeheader()
-        writer.writerows(rows)
-
-    output.seek(0)
-    return StreamingResponse(
-        iter([output.getvalue()]),
-        media_type="text/csv",
-        headers={"Content-Disposition": f"attachment; filename=in_progress_tickets_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}.csv"}
-    )
+async def export_in_progress_tickets(accept_encoding: Optional[str] = Header(None), current_user: dict = Depends(get_current_user)):
+    return _csv_export_response(_SQL_TICKET_LIST["in_progress", True], _TICKET_EXPORT_FIELDS, "in_progress_tickets", accept_encoding)
 
 @app.get("/api/export/closed-tickets")
-async def export_closed_tickets(current_user: dict = Depends(get_current_user)):
-    columns = _get_ticket_columns()
-    rows = db_query(f"SELECT {columns} FROM tickets WHERE status = 'acknowledged' ORDER BY ack_ts DESC")
-    
-    output = StringIO()
-    if rows:
-        fieldnames = list(rows[0].keys())
-        writer = csv.DictWriter(output, fieldnames=fieldnames)
-        writer.writeheader()
-        writer.writerows(rows)
-    
-    output.seek(0)
-    return StreamingResponse(
-        iter([output.getvalue()]),
-        media_type="text/csv",
-        headers={"Content-Disposition": f"attachment; filename=closed_tickets_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}.csv"}
-    )
+async def export_closed_tickets(accept_encoding: Optional[str] = Header(None), current_user: dict = Depends(get_current_user)):
+    return _csv_export_response(_SQL_TICKET_LIST["acknowledged", True], _TICKET_EXPORT_FIELDS, "closed_tickets", accept_encoding)
 
 @app.get("/api/export/audit-trail")
-async def export_audit_trail(current_user: dict = Depends(get_current_user)):
-    rows = db_query("SELECT * FROM audit_trail ORDER BY timestamp DESC")
-    
-    output = StringIO()
-    if rows:
-        fieldnames = list(rows[0].keys())
-        writer = csv.DictWriter(output, fieldnames=fieldnames)
-        writer.writeheader()
-        writer.writerows(rows)
-    
-    output.seek(0)
-    return StreamingResponse(
-        iter([output.getvalue()]),
-        media_type="text/csv",
-        headers={"Content-Disposition": f"attachment; filename=audit_trail_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}.csv"}
-    )
+async def export_audit_trail(accept_encoding: Optional[str] = Header(None), current_user: dict = Depends(get_current_user)):
+    return _csv_export_response(_SQL_AUDIT_EXPORT, _AUDIT_EXPORT_FIELDS, "audit_trail", accept_encoding)
 
 # --- JIRA WEBHOOK LISTENER ---
+# Jira workflow status (lower-cased) -> local ticket status; anything else re-opens
+_JIRA_STATUS_MAP = {
+    "done": "acknowledged", "resolved": "acknowledged", "closed": "acknowledged",
+    "in progress": "in_progress", "selected for development": "in_progress", "in review": "in_progress",
+}
+
 @app.post("/webhook/jira")
 async def webhook_jira(request: Request):
     logger.info("Jira Webhook: Received a request.")
-    if JIRA_WEBHOOK_SECRET:
-        secret = request.query_params.get("secret")
-        if secret != JIRA_WEBHOOK_SECRET:
-            logger.warning(f"Jira Webhook: Invalid secret: {secret}")
+    if _JIRA_WEBHOOK_SECRET_BYTES:
+        secret = request.query_params.get("secret") or ""
+        # Constant-time compare so response timing doesn't leak how much of the secret matched
+        if not hmac.compare_digest(secret.encode("utf-8"), _JIRA_WEBHOOK_SECRET_BYTES):
+            logger.warning("Jira Webhook: Invalid secret")
             raise HTTPException(status_code=401, detail="Invalid secret")
     else:
         logger.warning("JIRA_WEBHOOK_SECRET is not set. Webhook is insecure.")
 
     try:
-        body = await request.json()
+        body = orjson.loads(await request.body())
     except Exception as e:
         logger.error(f"Jira Webhook: Invalid JSON: {e}")
-        return JSONResponse({"status": "error", "message": "Invalid JSON"}, status_code=400)
+        return ORJSONResponse({"status": "error", "message": "Invalid JSON"}, status_code=400)
 
     event = body.get("webhookEvent")
     if event == "jira:issue_updated":
@@ -1853,34 +2296,30 @@ async def webhook_jira(request: Request):
             changed_item = next((item for item in changelog.get("items", []) if item.get("field") == "status"), None)
             if not changed_item:
                 logger.info(f"Jira Webhook: Ignoring update for {jira_key} (no status change).")
-                return JSONResponse({"status": "ignored", "message": "No status change"})
+                return ORJSONResponse({"status": "ignored", "message": "No status change"})
             new_status_name = changed_item.get("toString", "Unknown")
             new_status_name_lower = new_status_name.lower()
             logger.info(f"Jira Webhook: Received status update for {jira_key}. New status: {new_status_name}")
 
-            ticket = db_query("SELECT * FROM tickets WHERE itsm_ticket_id = :key", {"key": jira_key}, one=True)
+            # Only id/status are needed unless this event closes the ticket
+            ticket = db_query(_SQL_TICKET_STATUS_BY_ITSM, {"key": jira_key}, one=True)
             if not ticket:
                 logger.warning(f"Jira Webhook: Received update for {jira_key}, but no matching ticket found in local DB.")
-                return JSONResponse({"status": "not_found"})
+                return ORJSONResponse({"status": "not_found"})
 
             dynamic_action = f"Jira: {new_status_name.title()}"
             log_audit(ticket_id=ticket["id"], action=dynamic_action, 
                       details=f"Status for {jira_key} changed to '{new_status_name}' in Jira.",
                       itsm_ticket_id=jira_key)
             
-            new_local_status = None
-            if new_status_name_lower in ["done", "resolved", "closed"]:
-                new_local_status = "acknowledged"
-            elif new_status_name_lower in ["in progress", "selected for development", "in review"]:
-                new_local_status = "in_progress"
-            else:
-                new_local_status = "open"
+            new_local_status = _JIRA_STATUS_MAP.get(new_status_name_lower, "open")
             
             # Update ticket status based on Jira status
             if new_local_status == "acknowledged" and ticket.get("status") != "acknowledged":
                 user_name = body.get('user', {}).get('displayName', 'Jira User')
+                full_ticket = db_query(_SQL_TICKET_BY_ID, {"id": ticket["id"]}, one=True) or ticket
                 await perform_close_from_jira(
-                    ticket_id=ticket["id"], row=ticket, user_name=user_name, user_empid="JIRA",
+                    ticket_id=ticket["id"], row=full_ticket, user_name=user_name, user_empid="JIRA",
                     details=f"Ticket closed via Jira Webhook by user {user_name}"
                 )
             elif new_local_status == "in_progress" and ticket.get("status") != "in_progress":
@@ -1893,13 +2332,14 @@ async def webhook_jira(request: Request):
                 db_execute("UPDATE tickets SET status = 'open' WHERE id = :id", {"id": ticket["id"]})
                 logger.info(f"Jira Webhook: Re-opened ticket {ticket['id']} (Jira: {jira_key}).")
 
+            invalidate_dashboard_cache()
             await manager.broadcast({"event": "status_update", "ticket_id": ticket["id"], "new_status": new_local_status})
-            return JSONResponse({"status": "ok"})
+            return ORJSONResponse({"status": "ok"})
         except Exception as e:
             logger.error(f"Jira Webhook: Error processing issue_updated event: {e}")
-            return JSONResponse({"status": "error", "message": str(e)}, status_code=500)
+            return ORJSONResponse({"status": "error", "message": str(e)}, status_code=500)
             
-    return JSONResponse({"status": "ignored", "event": event})
+    return ORJSONResponse({"status": "ignored", "event": event})
 
 # --- WebSocket ---
 @app.websocket("/ws")
@@ -1912,4 +2352,4 @@ async def websocket_endpoint(websocket: WebSocket):
         manager.disconnect(websocket)
 
 
-#  uvicorn main:app --host 0.0.0.0 --port 8000
\ No newline at end of file
+#  uvicorn main:app --host 0.0.0.0 --port 8000 --loop uvloop --http httptools --no-access-log
\ No newline at end of file